@@ -0,0 +1,322 @@
+"""
+Benchmarks the app's key paths against synthetic databases with offline price providers.
+
+    python benchmark.py                               # all scales, results in benchmark_results.json
+    python benchmark.py --scales small --latency 200  # simulate a 200 ms provider round trip
+    python benchmark.py --compare old_results.json    # print the change against an earlier run
+    python benchmark.py --scales small --cold-start   # also time each page's first render in a fresh process
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+import modules.data_manager as dm
+import modules.market_data as md
+import modules.quote_cache as qc
+
+# transactions, holdings, days of net worth history
+SCALES = {
+    "small": (1_000, 10, 90),
+    "medium": (20_000, 50, 365),
+    "large": (100_000, 200, 3 * 365),
+}
+
+CATEGORIES = ["Maaş", "Kira", "Market", "Fatura", "Ulaşım", "Eğlence", "Sağlık", "Yatırım"]
+CURRENCIES = ["TRY", "TRY", "TRY", "USD", "EUR"]
+ASSET_TYPES = ["Fon (TEFAS)", "Kripto/Borsa", "Döviz/Altın"]
+
+# --- Synthetic data
+
+def generate_db(path, transactions, holdings, history_days, seed=42):
+    """Creates a finance database at `path` with reproducible random data."""
+    rng = np.random.default_rng(seed)
+    if os.path.exists(path):
+        os.remove(path)
+    dm.DB_FILE = path
+    dm.init_db()
+    # Keep the background refresher out of the measurements
+    dm.set_setting("refresher_enabled", "0")
+
+    today = datetime.date.today()
+    days = rng.integers(0, 5 * 365, transactions)
+    is_income = rng.random(transactions) < 0.2
+    df = pd.DataFrame({
+        "date": pd.to_datetime(today) - pd.to_timedelta(days, unit="D"),
+        "type": np.where(is_income, "Gelir", "Gider"),
+        "category": rng.choice(CATEGORIES, transactions),
+        "amount": np.round(np.where(is_income, rng.uniform(5_000, 50_000, transactions), rng.uniform(10, 2_000, transactions)), 2),
+        "currency": rng.choice(CURRENCIES, transactions),
+        "description": [f"İşlem {i}" for i in range(transactions)],
+        "import_hash": None,
+    })
+    df["date"] = df["date"].dt.strftime("%Y-%m-%d")
+    dm.import_transactions(df)
+
+    with dm.transaction():
+        for i in range(holdings):
+            asset_type = ASSET_TYPES[i % len(ASSET_TYPES)]
+            symbol = f"F{i:03d}" if asset_type == "Fon (TEFAS)" else f"S{i:03d}-USD" if i % 2 else f"S{i:03d}"
+            for _ in range(int(rng.integers(1, 6))):
+                date = today - datetime.timedelta(days=int(rng.integers(0, 3 * 365)))
+                dm.update_portfolio(asset_type, symbol, float(rng.uniform(1, 100)), float(rng.uniform(1, 500)), "Buy", date=date)
+
+    dates = pd.date_range(end=today - datetime.timedelta(days=1), periods=history_days, freq="D")
+    cash = np.cumsum(rng.normal(100, 1_000, history_days))
+    portfolio = np.cumsum(rng.normal(50, 500, history_days)) + 10_000
+    dm.save_history(pd.DataFrame({
+        "date": dates.strftime("%Y-%m-%d"),
+        "net_worth": cash + portfolio,
+        "cash_balance": cash,
+        "portfolio_value": portfolio,
+    }))
+
+# --- Offline providers
+
+def _offline_price(symbol):
+    """Deterministic price per symbol."""
+    return 10 + zlib.crc32(symbol.encode()) % 1000
+
+def install_offline_providers(latency=0.0):
+    """Replaces the network calls in market_data with deterministic offline ones (latency in seconds per call)."""
+    def prices(symbols):
+        time.sleep(latency)
+        return {s: _offline_price(s) for s in symbols}
+
+    def history(symbols, start_date, end_date):
+        time.sleep(latency)
+        dates = pd.date_range(start_date, end_date, freq="D")
+        return pd.DataFrame({s: np.full(len(dates), _offline_price(s), dtype=float) for s in symbols}, index=dates)
+
+    md.sync_tefas_snapshot = lambda force=False: False
+    md._fetch_tefas_prices = prices
+    md._download_market_prices = prices
+    md._fetch_tefas_price = lambda code: prices([code])[code]
+    md._fetch_market_price = lambda symbol: prices([symbol])[symbol]
+    md._download_market_history = history
+    md._fetch_tefas_history = lambda code, start_date, end_date: history([code], start_date, end_date)[code]
+
+# --- Measurements
+
+def reset_caches():
+    """Simulates a server restart: drops in-memory quotes and cached page data (persisted quotes are kept)."""
+    import streamlit as st
+    st.cache_data.clear()
+    qc.clear()
+
+def run_page(page, timeout):
+    """Renders one page of app.py through AppTest; returns elapsed seconds."""
+    import streamlit_option_menu
+    from streamlit.testing.v1 import AppTest
+    streamlit_option_menu.option_menu = lambda *args, **kwargs: page
+    at = AppTest.from_file("app.py", default_timeout=timeout)
+    started = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - started
+    if at.exception:
+        raise RuntimeError(f"{page}: {at.exception[0].value}")
+    return elapsed
+
+def timed(func):
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+def save_snapshot():
+    # Forget the last snapshot so every run writes instead of hitting the unchanged-snapshot shortcut
+    dm._last_snapshot = None
+    dm.save_daily_snapshot(datetime.date.today().isoformat(), time.time(), 0, 0)
+
+def cases(timeout):
+    """Yields (name, cold, callable returning seconds). Cold cases reset caches before each run."""
+    yield "dashboard_cold", True, lambda: run_page("Özet", timeout)
+    yield "dashboard_warm", False, lambda: run_page("Özet", timeout)
+    yield "portfolio_page_cold", True, lambda: run_page("Yatırımlarım", timeout)
+    yield "transactions_page", False, lambda: run_page("Gelir/Gider Ekle", timeout)
+    yield "portfolio_valuation", True, lambda: timed(lambda: md.value_portfolio(dm.get_portfolio()))
+    yield "balance_totals", False, lambda: timed(dm.get_balance_totals)
+    yield "transaction_listing", False, lambda: timed(lambda: dm.get_transactions_page(limit=50))
+    yield "transaction_search", False, lambda: timed(lambda: dm.search_transactions("market", limit=50))
+    yield "snapshot_save", False, lambda: timed(save_snapshot)
+
+def benchmark(scales, latency, runs, workdir, timeout):
+    install_offline_providers(latency)
+    results = []
+    for scale in scales:
+        transactions, holdings, history_days = SCALES[scale]
+        path = os.path.join(workdir, f"bench_{scale}.db")
+        started = time.perf_counter()
+        generate_db(path, transactions, holdings, history_days)
+        print(f"[{scale}] generated {transactions} transactions, {holdings} holdings in {time.perf_counter() - started:.1f}s")
+        for name, cold, case in cases(timeout):
+            if not cold:
+                case()  # warm-up
+            samples = []
+            for _ in range(runs):
+                if cold:
+                    reset_caches()
+                samples.append(case() * 1000)
+            result = {
+                "scale": scale,
+                "case": name,
+                "runs": runs,
+                "min_ms": round(min(samples), 2),
+                "median_ms": round(statistics.median(samples), 2),
+                "max_ms": round(max(samples), 2),
+            }
+            results.append(result)
+            print(f"[{scale}] {name:<22} median {result['median_ms']:>9.2f} ms  (min {result['min_ms']:.2f}, max {result['max_ms']:.2f})")
+        reset_caches()
+    return results
+
+# --- Cold start
+
+# Dependencies whose import time is reported for cold starts
+HEAVY_MODULES = ["pandas", "numpy", "plotly.express", "streamlit_option_menu", "yfinance", "tefas", "openpyxl", "modules.market_data"]
+
+# Runs in a fresh interpreter: argv = page, app path, timeout. Streamlit itself is loaded
+# before the clock starts since it's paid by `streamlit run` before app.py, too.
+COLD_START_SCRIPT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+import streamlit_option_menu
+streamlit_option_menu.option_menu = lambda *args, **kwargs: sys.argv[1]
+at = AppTest.from_file(sys.argv[2], default_timeout=float(sys.argv[3]))
+started = time.perf_counter()
+at.run()
+print(json.dumps({"render_ms": (time.perf_counter() - started) * 1000, "exceptions": [str(e.value) for e in at.exception]}))
+"""
+
+def _parse_importtime(stderr):
+    """Returns module -> cumulative import time (ms) from `python -X importtime` output."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        name = name.strip()
+        if cumulative.strip().isdigit() and name not in times:
+            times[name] = int(cumulative) / 1000
+    return times
+
+def _warm_quote_cache():
+    """Stores fresh offline quotes for every holding so cold renders don't hit the network."""
+    portfolio = dm.get_portfolio()
+    is_fund = portfolio['asset_type'].str.contains("Fon")
+    qc.put_many("tefas", {s: _offline_price(s) for s in portfolio.loc[is_fund, 'symbol']})
+    qc.put_many("yahoo", {s: _offline_price(s) for s in portfolio.loc[~is_fund, 'symbol']})
+    qc.put_many("fx", {s: _offline_price(s) for s in md.FX_TICKERS.values()})
+
+def cold_start(db_path, workdir, timeout):
+    """
+    Renders each page once in a fresh Python process against a copy of db_path.
+    Returns one result per page with the render time and the import time of HEAVY_MODULES
+    (None when the page didn't load a module).
+    """
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    cold_dir = os.path.join(workdir, "cold_start")
+    os.makedirs(cold_dir, exist_ok=True)
+    results = []
+    for page in ["Özet", "Gelir/Gider Ekle", "Yatırımlarım", "Faiz Hesapla", "Ayarlar"]:
+        # app.py opens finance_data.db in the working directory.
+        # The backup API also copies what is still in the WAL file.
+        copy_path = os.path.join(cold_dir, "finance_data.db")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(copy_path + suffix):
+                os.remove(copy_path + suffix)
+        dm.DB_FILE = db_path
+        with sqlite3.connect(copy_path) as copy:
+            dm.get_connection().backup(copy)
+        dm.DB_FILE = copy_path
+        # The copy replaced the previous page's file at the same path
+        dm.reopen_connections()
+        _warm_quote_cache()
+        dm.close_connection()
+
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", COLD_START_SCRIPT, page, os.path.join(app_dir, "app.py"), str(timeout)],
+            cwd=cold_dir, capture_output=True, text=True, timeout=timeout * 2,
+            env={**os.environ, "PYTHONPATH": app_dir},
+        )
+        output = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+        if proc.returncode != 0 or not output:
+            raise RuntimeError(f"cold start of {page} failed: {proc.stderr[-2000:]}")
+        run = json.loads(output[-1])
+        if run["exceptions"]:
+            raise RuntimeError(f"{page}: {run['exceptions'][0]}")
+        imports = _parse_importtime(proc.stderr)
+        result = {
+            "page": page,
+            "render_ms": round(run["render_ms"], 2),
+            "imports_ms": {name: imports.get(name) for name in HEAVY_MODULES},
+        }
+        results.append(result)
+        loaded = ", ".join(f"{name} {ms:.0f}" for name, ms in result["imports_ms"].items() if ms is not None)
+        print(f"[cold] {page:<18} {result['render_ms']:>9.2f} ms  imports (ms): {loaded or '-'}")
+    return results
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def compare(results, baseline_path):
+    """Prints the median change of each case against an earlier results file."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["scale"], r["case"]): r for r in json.load(f)["results"]}
+    for r in results:
+        old = baseline.get((r["scale"], r["case"]))
+        if old and old["median_ms"]:
+            change = (r["median_ms"] - old["median_ms"]) / old["median_ms"] * 100
+            print(f"[{r['scale']}] {r['case']:<22} {old['median_ms']:>9.2f} -> {r['median_ms']:>9.2f} ms ({change:+.1f}%)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default=",".join(SCALES), help="comma separated: " + ", ".join(SCALES))
+    parser.add_argument("--latency", type=float, default=0, help="simulated provider latency per call (ms)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=120, help="AppTest timeout per page render (s)")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--workdir", help="where the synthetic databases are created (default: a temp dir)")
+    parser.add_argument("--cold-start", action="store_true", help="also render each page in a fresh process (first scale's database)")
+    args = parser.parse_args()
+
+    scales = [s.strip() for s in args.scales.split(",") if s.strip()]
+    unknown = [s for s in scales if s not in SCALES]
+    if unknown:
+        parser.error(f"unknown scales: {', '.join(unknown)}")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="finance_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    results = benchmark(scales, args.latency / 1000, args.runs, workdir, args.timeout)
+    cold = cold_start(os.path.join(workdir, f"bench_{scales[0]}.db"), workdir, args.timeout) if args.cold_start else None
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({
+            "revision": git_revision(),
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "latency_ms": args.latency,
+            "results": results,
+            "cold_start": cold,
+        }, f, indent=2, ensure_ascii=False)
+    print(f"Results written to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+# Interest is compounded daily over a 365-day year (as Turkish deposit accounts quote it)
+DAYS_PER_YEAR = 365
+
+def annual_rates(dates, schedule):
+    """
+    Annual rate (in %) in effect on each date.
+    schedule: (start date, annual rate in %) pairs; the earliest rate also applies before its start date.
+    """
+    starts = pd.to_datetime([start for start, _ in schedule]).to_numpy()
+    rates = np.asarray([rate for _, rate in schedule], dtype=float)
+    order = np.argsort(starts, kind="stable")
+    starts, rates = starts[order], rates[order]
+    idx = np.searchsorted(starts, pd.to_datetime(dates).to_numpy(), side="right") - 1
+    return rates[np.clip(idx, 0, None)]
+
+def net_daily_rates(annual, tax_rate=0.0):
+    """Daily compounded rate equivalent to each annual rate (in %), after withholding tax (in %)."""
+    annual = np.asarray(annual, dtype=float) / 100
+    return ((1 + annual) ** (1 / DAYS_PER_YEAR) - 1) * (1 - tax_rate / 100)
+
+def accrue(principal, start_date, end_date, schedule, tax_rate=0.0):
+    """
+    Daily compounded, withholding-adjusted interest on principal for every day from start_date
+    to end_date (inclusive); each day's interest is added to the balance the next day earns on.
+    Returns a DataFrame (date, annual_rate, interest, balance) with one row per day.
+    """
+    dates = pd.date_range(start_date, end_date, freq="D")
+    annual = annual_rates(dates, schedule)
+    growth = np.cumprod(1 + net_daily_rates(annual, tax_rate))
+    balance = principal * growth
+    # Interest of a day = balance after the day - balance before it
+    interest = np.diff(balance, prepend=principal)
+    return pd.DataFrame({"date": dates, "annual_rate": annual, "interest": interest, "balance": balance})
+
+def yearly_summary(accruals):
+    """Sums an accrue() result per calendar year: (year, interest, balance at year end)."""
+    years = accruals["date"].dt.year
+    summary = accruals.groupby(years).agg(interest=("interest", "sum"), balance=("balance", "last"))
+    return summary.rename_axis("year").reset_index()
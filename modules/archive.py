@@ -0,0 +1,252 @@
+import os
+import glob
+import shutil
+import datetime
+import threading
+import pandas as pd
+import modules.data_manager as dm
+import modules.perf as perf
+
+# Transactions older than this many months (counted from the start of this month) are archived
+DEFAULT_HORIZON_MONTHS = 24
+
+# Columns kept in the Parquet files, one file per month:
+# finance_data_archive/month=YYYY-MM/part-0.parquet
+COLUMNS = ["id", "date", "type", "category", "amount", "currency", "description", "asset_id", "import_hash"]
+
+# Serializes archive runs: a run's files must be in place before the next one merges into them
+_lock = threading.Lock()
+
+def get_dir():
+    """Archive directory next to the database file."""
+    return os.path.splitext(dm.DB_FILE)[0] + "_archive"
+
+def _partition_path(month):
+    return os.path.join(get_dir(), f"month={month}", "part-0.parquet")
+
+def _schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("id", pa.int64()),
+        ("date", pa.string()),
+        ("type", pa.string()),
+        ("category", pa.string()),
+        ("amount", pa.float64()),
+        ("currency", pa.string()),
+        ("description", pa.string()),
+        ("asset_id", pa.int64()),
+        ("import_hash", pa.int64()),
+    ])
+
+def get_horizon():
+    """Returns the archive horizon in months."""
+    return int(dm.get_setting("archive_horizon", DEFAULT_HORIZON_MONTHS))
+
+def get_cutoff(months, today=None):
+    """First day of the month `months` months before today's month; rows dated before it are archived."""
+    today = today or datetime.date.today()
+    index = today.year * 12 + today.month - 1 - months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+# --- Writing
+
+def _staged_path(month):
+    return _partition_path(month) + ".staged"
+
+def _write_partition(month, rows):
+    """
+    Merges rows into a month's file (rows already there with the same id are replaced); returns the merged rows.
+    The result is written next to the file (_staged_path) and only replaces it once the unit of work has committed.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    path = _partition_path(month)
+    if os.path.exists(path):
+        existing = pq.read_table(path).to_pandas()
+        rows = pd.concat([existing[~existing['id'].isin(rows['id'])], rows], ignore_index=True)
+    # Sorted by date so the row group statistics let date filters skip data
+    rows = rows.sort_values(["date", "id"], ignore_index=True)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pq.write_table(pa.Table.from_pandas(rows[COLUMNS], schema=_schema(), preserve_index=False), _staged_path(month))
+    return rows
+
+def _archive_before(cutoff):
+    with dm.transaction() as c:
+        # Investment rows stay in SQLite: they are edited and deleted together with their holding
+        c.execute(f"SELECT {', '.join(COLUMNS)} FROM transactions WHERE date < ? AND asset_id IS NULL", (str(cutoff),))
+        df = pd.DataFrame(c.fetchall(), columns=COLUMNS, dtype=object)
+        if df.empty:
+            return 0
+        # Nullable integers, so 64-bit import hashes don't pass through float
+        df = df.astype({"id": "int64", "amount": "float64", "asset_id": "Int64", "import_hash": "Int64"})
+        for month, rows in df.groupby(df['date'].str[:7]):
+            merged = _write_partition(month, rows)
+            summary = merged.groupby(["type", "category", "currency"], dropna=False).agg(
+                total=("amount", "sum"), count=("id", "size")
+            ).reset_index()
+            c.execute("DELETE FROM archive_summary WHERE month = ?", (month,))
+            c.executemany(
+                "INSERT INTO archive_summary (month, type, category, currency, total, count) VALUES (?, ?, ?, ?, ?, ?)",
+                [(month, *row) for row in summary.astype(object).where(summary.notna(), None).itertuples(index=False, name=None)],
+            )
+        # balance_totals is left as is: archived rows still count towards the balance
+        c.execute("DELETE FROM transactions WHERE date < ? AND asset_id IS NULL", (str(cutoff),))
+    return len(df)
+
+def archive_transactions(months=None):
+    """
+    Moves transactions dated before get_cutoff(months) (not linked to a holding) from SQLite into
+    monthly Parquet files and keeps per-month summary rows in archive_summary.
+    months: horizon in months (defaults to the stored setting). Returns the number of rows archived.
+    """
+    months = get_horizon() if months is None else months
+    with _lock, perf.span("archive.write"):
+        recover()
+        try:
+            archived = dm.execute(_archive_before, get_cutoff(months))
+        except BaseException:
+            # Rolled back: the rows are still in SQLite, so the new files must not appear
+            for path in glob.glob(_staged_path("*")):
+                os.remove(path)
+            raise
+        # Committed: the rows are only in the new files now
+        for path in glob.glob(_staged_path("*")):
+            os.replace(path, path[:-len(".staged")])
+        return archived
+
+def recover():
+    """
+    Settles files left staged by an archive run that stopped between its commit and the renames:
+    a staged file holding as many rows as the month's summary rows count was committed and
+    replaces the month's file, any other staged file belongs to a rolled back run and is deleted.
+    """
+    staged = glob.glob(_staged_path("*"))
+    if not staged:
+        return
+    import pyarrow.parquet as pq
+    for path in staged:
+        month = os.path.basename(os.path.dirname(path)).removeprefix("month=")
+        c = dm.get_connection().cursor()
+        c.execute("SELECT COALESCE(SUM(count), 0) FROM archive_summary WHERE month = ?", (month,))
+        committed = c.fetchone()[0]
+        final = path[:-len(".staged")]
+        try:
+            rows = pq.ParquetFile(path).metadata.num_rows
+        except Exception:
+            rows = None
+        if rows == committed and not (os.path.exists(final) and pq.ParquetFile(final).metadata.num_rows == committed):
+            os.replace(path, final)
+        else:
+            os.remove(path)
+
+def clear():
+    """Deletes all archive files (the summary rows are dropped with the database)."""
+    shutil.rmtree(get_dir(), ignore_errors=True)
+
+# --- Reading
+
+def _months_in_range(filters, months=None):
+    """Archived months that can hold rows matching the date filters."""
+    filters = filters or {}
+    archived = dm.get_archive_months() if months is None else sorted(months)
+    start = str(filters["start_date"])[:7] if filters.get("start_date") else None
+    end = str(filters["end_date"])[:7] if filters.get("end_date") else None
+    return [m for m in archived if (start is None or m >= start) and (end is None or m <= end)]
+
+def _expression(filters, after_key=None):
+    """Filters (same dict as dm.get_transactions_page) as a pyarrow expression, pushed down to the Parquet reader."""
+    import pyarrow.dataset as ds
+    filters = filters or {}
+    conditions = []
+    if filters.get("start_date"):
+        conditions.append(ds.field("date") >= str(filters["start_date"]))
+    if filters.get("end_date"):
+        conditions.append(ds.field("date") <= str(filters["end_date"]))
+    if filters.get("type"):
+        conditions.append(ds.field("type") == filters["type"])
+    if filters.get("category"):
+        conditions.append(ds.field("category") == filters["category"])
+    if after_key is not None:
+        date, id_ = after_key
+        conditions.append((ds.field("date") < date) | ((ds.field("date") == date) & (ds.field("id") < id_)))
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+def _read_months(months, columns, expression):
+    import pyarrow.dataset as ds
+    paths = [p for p in map(_partition_path, months) if os.path.exists(p)]
+    if not paths:
+        return pd.DataFrame(columns=columns)
+    # Only the listed files are opened and only `columns` are decoded
+    dataset = ds.dataset(paths, schema=_schema(), format="parquet")
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+def read(filters=None, columns=None, months=None):
+    """
+    Reads archived transactions as a DataFrame.
+    filters: same dict as dm.get_transactions_page; months outside the date range are not opened.
+    columns: columns to read (default all); months: restrict to these archived months.
+    """
+    with perf.span("archive.read"):
+        return _read_months(_months_in_range(filters, months), columns or COLUMNS, _expression(filters))
+
+def read_page(after_key, limit, filters=None):
+    """Up to `limit` archived transactions older than after_key (date, id), newest first; reads month by month."""
+    months = _months_in_range(filters)
+    if after_key is not None:
+        months = [m for m in months if m <= after_key[0][:7]]
+    expression = _expression(filters, after_key)
+    pages = []
+    found = 0
+    with perf.span("archive.read"):
+        for month in reversed(months):
+            rows = _read_months([month], COLUMNS, expression)
+            pages.append(rows)
+            found += len(rows)
+            if found >= limit:
+                break
+    if not pages:
+        return pd.DataFrame(columns=COLUMNS)
+    df = pd.concat(pages, ignore_index=True)
+    return df.sort_values(["date", "id"], ascending=False).head(limit)
+
+def rollup(dimensions, filters=None):
+    """
+    Archive part of dm.get_rollup: whole months come from the summary rows in SQLite,
+    months cut by the date filters are aggregated from their Parquet files.
+    """
+    filters = filters or {}
+    dimensions = list(dimensions)
+    start, end = filters.get("start_date"), filters.get("end_date")
+    months = _months_in_range(filters)
+    # A month is cut when the range starts after its first day or ends before its last one
+    partial = [m for m in months
+               if (start and str(start) > f"{m}-01") or (end and str(end) < str(pd.Period(m, "M").end_time.date()))]
+    whole = [m for m in months if m not in partial]
+
+    frames = []
+    if whole:
+        clauses = [f"month IN ({', '.join('?' * len(whole))})"]
+        params = list(whole)
+        for field in ("type", "category"):
+            if filters.get(field):
+                clauses.append(f"{field} = ?")
+                params.append(filters[field])
+        select = "".join(f"{d}, " for d in dimensions)
+        frames.append(pd.read_sql_query(f"""
+            SELECT {select}SUM(total) AS total, SUM(count) AS count
+            FROM archive_summary WHERE {' AND '.join(clauses)}
+            {f"GROUP BY {', '.join(dimensions)}" if dimensions else ''}
+        """, dm.get_connection(), params=params))
+    if partial:
+        rows = read(filters, columns=["date", "type", "category", "currency", "amount"], months=partial)
+        rows['month'] = rows['date'].str[:7]
+        if dimensions:
+            frames.append(rows.groupby(dimensions, dropna=False, as_index=False).agg(total=("amount", "sum"), count=("amount", "size")))
+        else:
+            frames.append(pd.DataFrame({"total": [rows['amount'].sum()], "count": [len(rows)]}))
+    if not frames:
+        return pd.DataFrame(columns=dimensions + ["total", "count"])
+    return pd.concat(frames, ignore_index=True)
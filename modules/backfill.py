@@ -0,0 +1,92 @@
+import datetime
+import pandas as pd
+import modules.data_manager as dm
+import modules.market_data as md
+
+# Extra days of prices fetched before the range start so the first days can be forward-filled
+PRICE_LOOKBACK_DAYS = 10
+
+def _daily(frame, dates):
+    """Aligns a date-indexed frame to a daily calendar, carrying the last known value forward."""
+    return frame.reindex(frame.index.union(dates)).sort_index().ffill().reindex(dates)
+
+def _fx_rate(closes, currency, dates):
+    """
+    Daily TRY rate for a currency out of the closes frame. Days before its first close use the
+    last known rate (md.get_fx_rates); NaN where the currency has no rate at all.
+    """
+    if currency == md.REPORTING_CURRENCY:
+        return pd.Series(1.0, index=dates)
+    ticker = md.FX_TICKERS.get(currency)
+    if ticker in closes.columns:
+        rate = _daily(closes[[ticker]], dates)[ticker]
+    else:
+        rate = pd.Series(float("nan"), index=dates)
+    if rate.isna().any():
+        rate = rate.fillna(md.get_fx_rates([currency]).get(currency, float("nan")))
+    return rate
+
+def compute_net_worth(start_date, end_date, closes, positions=None, cash_flows=None):
+    """
+    Computes daily net worth for a date range as one vectorized pass over a dates x assets matrix.
+    closes: daily closes indexed by date, one column per symbol (and FX ticker).
+    positions / cash_flows: dm.get_position_history() / dm.get_daily_cash_flows() (read when omitted).
+    Returns a DataFrame (date, net_worth, cash_balance, portfolio_value) with dates as 'YYYY-MM-DD'.
+    """
+    dates = pd.date_range(start_date, end_date, freq="D")
+    positions = dm.get_position_history() if positions is None else positions
+    cash_flows = dm.get_daily_cash_flows() if cash_flows is None else cash_flows
+
+    # --- Cash: cumulative net flow per currency, valued at each day's FX rate
+    cash = pd.Series(0.0, index=dates)
+    if not cash_flows.empty:
+        flows = cash_flows.assign(date=pd.to_datetime(cash_flows['date']))
+        per_currency = flows.pivot_table(index='date', columns='currency', values='net', aggfunc='sum')
+        balances = per_currency.reindex(per_currency.index.union(dates)).fillna(0).cumsum().reindex(dates)
+        rates = pd.DataFrame({ccy: _fx_rate(closes, ccy, dates) for ccy in balances.columns})
+        # A day is left NaN when a currency held that day has no rate (zero balances need none)
+        cash = (balances * rates).where(balances != 0, 0.0).sum(axis=1, skipna=False)
+
+    # --- Holdings: quantity after each trade day, carried forward, times that day's TRY price
+    portfolio_value = pd.Series(0.0, index=dates)
+    if not positions.empty:
+        positions = positions.assign(date=pd.to_datetime(positions['date']))
+        quantities = _daily(positions.pivot_table(index='date', columns='symbol', values='quantity', aggfunc='last'), dates).fillna(0)
+        trade_prices = _daily(positions.pivot_table(index='date', columns='symbol', values='price', aggfunc='last'), dates)
+
+        prices = _daily(closes.reindex(columns=quantities.columns), dates)
+        assets = positions.drop_duplicates('symbol')
+        quote_currency = md.quote_currencies(assets).set_axis(assets['symbol'])
+        usd_symbols = quantities.columns[(quote_currency.reindex(quantities.columns) == "USD").to_numpy()]
+        if len(usd_symbols):
+            prices[usd_symbols] = prices[usd_symbols].mul(_fx_rate(closes, "USD", dates), axis=0)
+        # Days without a market close fall back to the last trade price
+        prices = prices.fillna(trade_prices)
+        portfolio_value = (quantities * prices).sum(axis=1)
+
+    return pd.DataFrame({
+        "date": dates.strftime("%Y-%m-%d"),
+        "net_worth": (cash + portfolio_value).to_numpy(),
+        "cash_balance": cash.to_numpy(),
+        "portfolio_value": portfolio_value.to_numpy(),
+    })
+
+def backfill_history(start_date, end_date=None):
+    """
+    Rebuilds the history table for a date range from transactions, the trade ledger
+    and historical closes. Days that cannot be valued (a currency without any FX rate)
+    are not written. Returns the number of days written.
+    """
+    end_date = end_date or datetime.date.today()
+    positions = dm.get_position_history()
+    cash_flows = dm.get_daily_cash_flows()
+
+    symbols = list(positions['symbol'].unique())
+    funds = positions.loc[positions['asset_type'].str.contains("Fon"), 'symbol'].unique()
+    fx_tickers = [md.FX_TICKERS[c] for c in set(cash_flows['currency']) | {"USD"} if c in md.FX_TICKERS]
+    closes = md.get_history_closes(symbols + fx_tickers, funds,
+                                   start_date - datetime.timedelta(days=PRICE_LOOKBACK_DAYS), end_date)
+
+    history = compute_net_worth(start_date, end_date, closes, positions, cash_flows).dropna(subset=["net_worth"])
+    dm.save_history(history)
+    return len(history)
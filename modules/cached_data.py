@@ -0,0 +1,84 @@
+import streamlit as st
+import modules.data_manager as dm
+import modules.timeseries as ts
+
+# Valuations also depend on live quotes, so they expire with the shortest quote TTL (FX)
+VALUATION_TTL = 60
+
+def versioned(func, ttl=None, version=dm.get_data_version):
+    """
+    Wraps a read function in st.cache_data keyed on dm.get_data_version() plus its own arguments.
+    Results are recomputed only after a write to user data (or after ttl seconds, if given),
+    so reruns that change nothing don't touch SQLite.
+    version: function returning the cache key (history and settings readers use
+    dm.get_history_version / dm.get_settings_version).
+    """
+    def cached(version, *args, **kwargs):
+        return func(*args, **kwargs)
+    # st.cache_data keys on the function name; give each wrapped reader its own
+    cached.__qualname__ = f"versioned.{func.__module__}.{func.__name__}"
+    cached = st.cache_data(show_spinner=False, ttl=ttl)(cached)
+
+    def wrapper(*args, **kwargs):
+        return cached(version(), *args, **kwargs)
+    wrapper.__doc__ = func.__doc__
+    return wrapper
+
+get_transactions_page = versioned(dm.get_transactions_page)
+get_categories = versioned(dm.get_categories)
+get_portfolio = versioned(dm.get_portfolio)
+get_trades = versioned(dm.get_trades)
+get_history = versioned(dm.get_history, version=dm.get_history_version)
+get_monthly_totals = versioned(dm.get_monthly_totals)
+get_rollup = versioned(dm.get_rollup)
+search_transactions = versioned(dm.search_transactions)
+get_last_accrual_date = versioned(dm.get_last_accrual_date)
+get_setting = versioned(dm.get_setting, version=dm.get_settings_version)
+
+def _cash_totals():
+    """Returns (total_income, total_expense) in TRY from the running totals (NaN when a currency has no rate)."""
+    totals = dm.get_balance_totals()
+    if totals.empty:
+        return 0.0, 0.0
+    totals = _to_try(totals, ['income', 'expense'])
+    return float(totals['income'].sum(skipna=False)), float(totals['expense'].sum(skipna=False))
+
+def _to_try(df, value_columns):
+    """Converts value columns of a frame with a 'currency' column to TRY (one FX lookup per currency)."""
+    import modules.market_data as md
+    rates = md.get_fx_rates(df['currency'].unique())
+    return df.assign(**{col: md.convert_amounts(df[col], df['currency'], rates) for col in value_columns})
+
+def _category_totals(t_type):
+    """Returns (category, total) in TRY for one transaction type, largest first (SQL rollup; NaN total when a currency has no rate)."""
+    rollup = dm.get_rollup(["category", "currency"], {"type": t_type})
+    if rollup.empty:
+        return rollup[['category', 'total']]
+    totals = _to_try(rollup, ['total']).groupby('category', as_index=False)['total'].sum(skipna=False)
+    return totals.sort_values('total', ascending=False, ignore_index=True)
+
+def _monthly_flows(months=12):
+    """Returns (month, income, expense) in TRY for the last `months` months with transactions (running totals; NaN when a currency has no rate)."""
+    monthly = dm.get_monthly_totals()
+    if monthly.empty:
+        return monthly[['month', 'income', 'expense']]
+    monthly = monthly[monthly['month'].isin(sorted(monthly['month'].unique())[-months:])]
+    return _to_try(monthly, ['income', 'expense']).groupby('month', as_index=False)[['income', 'expense']].sum(skipna=False)
+
+def _valued_portfolio():
+    """Returns current holdings with 'current_price' and 'current_value' columns (see md.value_portfolio)."""
+    import modules.market_data as md
+    portfolio = dm.get_portfolio()
+    if portfolio.empty:
+        return portfolio
+    return md.value_portfolio(portfolio)
+
+def _history_points(start_date=None, end_date=None, resolution="auto", max_points=ts.MAX_POINTS):
+    """Net worth history for a date range, aggregated and downsampled for charting (see ts.reduce_series)."""
+    return ts.reduce_series(dm.get_history(start_date, end_date), 'net_worth', resolution, max_points)
+
+get_history_points = versioned(_history_points, version=dm.get_history_version)
+get_cash_totals = versioned(_cash_totals, ttl=VALUATION_TTL)
+get_category_totals = versioned(_category_totals, ttl=VALUATION_TTL)
+get_monthly_flows = versioned(_monthly_flows, ttl=VALUATION_TTL)
+get_valued_portfolio = versioned(_valued_portfolio, ttl=VALUATION_TTL)
@@ -1,191 +1,1142 @@
 
 import sqlite3
+import threading
+import datetime
+import functools
+import queue
+from concurrent.futures import Future
+from contextlib import contextmanager
 import pandas as pd
 import os
+import modules.perf as perf
 
 DB_FILE = "finance_data.db"
 
+# Per-thread open connection (sqlite3 connections must not be shared across threads)
+_local = threading.local()
+# Bumped by reopen_connections(); threads holding an older connection reopen it
+_generation = 0
+
 def init_db():
     """Initializes the SQLite database with necessary tables."""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
-    # Transactions Table (Income/Expense)
-    c.execute('''CREATE TABLE IF NOT EXISTS transactions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TEXT,
-                    type TEXT, -- 'Income', 'Expense'
-                    category TEXT,
-                    amount REAL,
-                    currency TEXT,
-                    description TEXT
-                )''')
+    with transaction() as c:
+        # Transactions Table (Income/Expense)
+        c.execute('''CREATE TABLE IF NOT EXISTS transactions (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        date TEXT,
+                        type TEXT, -- 'Income', 'Expense'
+                        category TEXT,
+                        amount REAL,
+                        currency TEXT,
+                        description TEXT,
+                        asset_id INTEGER REFERENCES portfolio(id) ON DELETE CASCADE, -- Holding for 'Yatırım' rows
+                        import_hash INTEGER -- Content hash of rows imported from bank statements
+                    )''')
     
-    # Portfolio Table (Holdings)
-    c.execute('''CREATE TABLE IF NOT EXISTS portfolio (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    asset_type TEXT, -- 'Fund', 'Stock', 'Crypto', 'Gold', 'USD'
-                    symbol TEXT,
-                    quantity REAL,
-                    avg_cost REAL
-                )''')
+        # Portfolio Table (Holdings)
+        c.execute('''CREATE TABLE IF NOT EXISTS portfolio (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        asset_type TEXT, -- 'Fund', 'Stock', 'Crypto', 'Gold', 'USD'
+                        symbol TEXT,
+                        quantity REAL,
+                        avg_cost REAL
+                    )''')
                 
-    # History Table (Net Worth Snapshots)
-    c.execute('''CREATE TABLE IF NOT EXISTS history (
-                    date TEXT PRIMARY KEY,
-                    net_worth REAL,
-                    cash_balance REAL,
-                    portfolio_value REAL
-                )''')
+        # Trades Table (Ledger of every Buy/Sell/Adjust; portfolio is derived from it)
+        c.execute('''CREATE TABLE IF NOT EXISTS trades (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        asset_id INTEGER REFERENCES portfolio(id) ON DELETE CASCADE,
+                        date TEXT,
+                        action TEXT, -- 'Buy', 'Sell', 'Adjust'
+                        quantity REAL,
+                        price REAL
+                    )''')
+
+        # Holding Checkpoints Table (Position after every CHECKPOINT_EVERY trades of an asset)
+        c.execute('''CREATE TABLE IF NOT EXISTS holding_checkpoints (
+                        asset_id INTEGER REFERENCES portfolio(id) ON DELETE CASCADE,
+                        trade_date TEXT,
+                        trade_id INTEGER,
+                        quantity REAL,
+                        avg_cost REAL,
+                        PRIMARY KEY (asset_id, trade_date, trade_id)
+                    )''')
+                
+        # History Table (Net Worth Snapshots)
+        c.execute('''CREATE TABLE IF NOT EXISTS history (
+                        date TEXT PRIMARY KEY,
+                        net_worth REAL,
+                        cash_balance REAL,
+                        portfolio_value REAL
+                    )''')
+
+        # Price Cache Table (Last known quotes, used for warm start)
+        c.execute('''CREATE TABLE IF NOT EXISTS price_cache (
+                        provider TEXT, -- 'yahoo', 'tefas', 'fx'
+                        symbol TEXT,
+                        price REAL,
+                        fetched_at REAL, -- Unix timestamp of the fetch
+                        PRIMARY KEY (provider, symbol)
+                    )''')
+
+        # TEFAS Prices Table (Daily bulk snapshot of all funds)
+        c.execute('''CREATE TABLE IF NOT EXISTS tefas_prices (
+                        code TEXT,
+                        date TEXT,
+                        price REAL,
+                        PRIMARY KEY (code, date)
+                    ) WITHOUT ROWID''')
+
+        # Settings Table (Key/value application state)
+        c.execute('''CREATE TABLE IF NOT EXISTS settings (
+                        key TEXT PRIMARY KEY,
+                        value TEXT
+                    )''')
+
+        # Balance Totals Table (Running income/expense per currency and month)
+        c.execute('''CREATE TABLE IF NOT EXISTS balance_totals (
+                        currency TEXT,
+                        month TEXT, -- 'YYYY-MM', or '*' for all time
+                        income REAL,
+                        expense REAL,
+                        PRIMARY KEY (currency, month)
+                    )''')
+
+        # Archive Summary Table (Per-month rollup of transactions moved to Parquet, see archive.py)
+        c.execute('''CREATE TABLE IF NOT EXISTS archive_summary (
+                        month TEXT, -- 'YYYY-MM'
+                        type TEXT,
+                        category TEXT,
+                        currency TEXT,
+                        total REAL,
+                        count INTEGER
+                    )''')
+
+        # Migrate databases created before transactions.asset_id existed
+        c.execute("PRAGMA table_info(transactions)")
+        if "asset_id" not in [col[1] for col in c.fetchall()]:
+            c.execute("ALTER TABLE transactions ADD COLUMN asset_id INTEGER REFERENCES portfolio(id) ON DELETE CASCADE")
+            _merge_duplicate_assets(c)
+            # Link existing investment rows by their "{symbol} Alış/Satış" description
+            c.execute('''UPDATE transactions SET asset_id = (
+                            SELECT p.id FROM portfolio p
+                            WHERE transactions.description LIKE p.symbol || ' %'
+                            ORDER BY length(p.symbol) DESC LIMIT 1
+                        )
+                        WHERE category = 'Yatırım' AND asset_id IS NULL''')
+
+        # Migrate databases created before transactions.import_hash existed
+        c.execute("PRAGMA table_info(transactions)")
+        if "import_hash" not in [col[1] for col in c.fetchall()]:
+            c.execute("ALTER TABLE transactions ADD COLUMN import_hash INTEGER")
+
+        # Full-text index over description and category (see search_transactions)
+        c.execute("SELECT sql FROM sqlite_master WHERE name = 'transactions_fts'")
+        row = c.fetchone()
+        if row and "content=" in row[0]:
+            # Older databases used an external-content table, whose content (transactions) is not the
+            # folded text it indexes: integrity-check fails and 'rebuild' would drop the folding
+            for trigger in ("transactions_fts_insert", "transactions_fts_delete", "transactions_fts_update"):
+                c.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            c.execute("DROP TABLE transactions_fts")
+            row = None
+        fts_missing = row is None
+        # Keeps its own copy of the folded text, so the index always matches its content
+        c.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+                        description, category,
+                        tokenize='unicode61 remove_diacritics 2'
+                    )''')
+        # Kept in sync by triggers, so every write path (edits, archiving) is covered;
+        # bulk inserts index their rows in one statement instead (see _bulk_fts_insert)
+        _create_fts_insert_trigger(c)
+        c.execute('''CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN
+                        DELETE FROM transactions_fts WHERE rowid = old.id;
+                    END''')
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS transactions_fts_update AFTER UPDATE OF description, category ON transactions BEGIN
+                        UPDATE transactions_fts SET description = {_fts_fold("new.description")}, category = {_fts_fold("new.category")}
+                        WHERE rowid = new.id;
+                    END''')
+        if fts_missing:
+            c.execute(f'''INSERT INTO transactions_fts (rowid, description, category)
+                         SELECT id, {_fts_fold("description")}, {_fts_fold("category")} FROM transactions''')
+
+        # Indexes
+        c.execute("CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(date)")
+        # Covers the analytics rollups (type / date range filter, grouped by category, currency, month)
+        c.execute("DROP INDEX IF EXISTS idx_transactions_type_date")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_transactions_rollup ON transactions(type, date, category, currency, amount)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions(category)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_transactions_asset ON transactions(asset_id)")
+        c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_portfolio_symbol ON portfolio(symbol)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_trades_asset_date ON trades(asset_id, date, id)")
+        c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_import_hash ON transactions(import_hash) WHERE import_hash IS NOT NULL")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_archive_summary_month ON archive_summary(month)")
+
+        # Seed the ledger for holdings that predate it with an opening 'Adjust' trade
+        c.execute('''INSERT INTO trades (asset_id, date, action, quantity, price)
+                     SELECT p.id, COALESCE((SELECT MIN(date) FROM transactions t WHERE t.asset_id = p.id), date('now')),
+                            'Adjust', p.quantity, p.avg_cost
+                     FROM portfolio p
+                     WHERE NOT EXISTS (SELECT 1 FROM trades WHERE asset_id = p.id)''')
+
+        # Fill totals for databases created before the table existed
+        c.execute("SELECT EXISTS (SELECT 1 FROM transactions) AND NOT EXISTS (SELECT 1 FROM balance_totals)")
+        if c.fetchone()[0]:
+            _apply_totals(c, "1 = 1")
+
+def _fts_fold(column):
+    # unicode61 folds case and diacritics (İ, ş, ç...) but keeps the Turkish dotless ı apart from i
+    return f"replace({column}, 'ı', 'i')"
+
+# While this settings row exists (only ever inside a bulk insert's unit of work, so other
+# connections never see it) the insert trigger is skipped; see _bulk_fts_insert
+FTS_DEFERRED_KEY = "fts_deferred"
+
+def _create_fts_insert_trigger(c):
+    c.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'transactions_fts_insert'")
+    row = c.fetchone()
+    if row and "WHEN" not in row[0]:
+        # Created before bulk inserts could skip it
+        c.execute("DROP TRIGGER transactions_fts_insert")
+    c.execute(f'''CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions
+                    WHEN NOT EXISTS (SELECT 1 FROM settings WHERE key = '{FTS_DEFERRED_KEY}') BEGIN
+                    INSERT INTO transactions_fts (rowid, description, category)
+                    VALUES (new.id, {_fts_fold("new.description")}, {_fts_fold("new.category")});
+                END''')
+
+@contextmanager
+def _bulk_fts_insert(c):
+    """
+    For inserting many transactions inside a unit of work: yields the highest id before the block,
+    and indexes the rows added in the block with one set-based statement instead of running the
+    per-row insert trigger. The trigger stays in place (no schema change, so other connections
+    keep their prepared statements); a settings row that exists only inside the block skips it.
+    """
+    c.execute("SELECT COALESCE(MAX(id), 0) FROM transactions")
+    last_id = c.fetchone()[0]
+    c.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, '1')", (FTS_DEFERRED_KEY,))
+    try:
+        yield last_id
+    finally:
+        c.execute("DELETE FROM settings WHERE key = ?", (FTS_DEFERRED_KEY,))
+    c.execute(f"""INSERT INTO transactions_fts (rowid, description, category)
+                  SELECT id, {_fts_fold("description")}, {_fts_fold("category")} FROM transactions WHERE id > ?""", (last_id,))
 
-    conn.commit()
-    conn.close()
+def _merge_duplicate_assets(c):
+    """Collapses portfolio rows sharing a symbol into one (needed before the UNIQUE symbol index)."""
+    c.execute("SELECT symbol FROM portfolio GROUP BY symbol HAVING COUNT(*) > 1")
+    for (symbol,) in c.fetchall():
+        c.execute("SELECT id, quantity, avg_cost FROM portfolio WHERE symbol = ? ORDER BY id", (symbol,))
+        rows = c.fetchall()
+        keep_id = rows[0][0]
+        total_qty = sum(qty for _, qty, _ in rows)
+        avg = sum(qty * cost for _, qty, cost in rows) / total_qty if total_qty else rows[0][2]
+        c.execute("UPDATE portfolio SET quantity = ?, avg_cost = ? WHERE id = ?", (total_qty, avg, keep_id))
+        c.executemany("DELETE FROM portfolio WHERE id = ?", [(row[0],) for row in rows[1:]])
+
+def _open_connection():
+    """Opens a connection with WAL journaling and tuned pragmas."""
+    conn = sqlite3.connect(DB_FILE, timeout=30)
+    # WAL lets readers run while a write is in progress (several phones via run_mobile.py)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # In WAL mode NORMAL only fsyncs at checkpoints and is still safe against corruption
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA cache_size=-16000")  # ~16 MB page cache
+    conn.execute("PRAGMA mmap_size=268435456")  # 256 MB memory-mapped reads
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
 
 def get_connection():
-    return sqlite3.connect(DB_FILE)
+    """Returns this thread's connection, opening it on first use and keeping it open across calls."""
+    conn = getattr(_local, "conn", None)
+    # Never swap the connection under an open unit of work
+    stale = conn is not None and _local.depth == 0 and (_local.path != DB_FILE or _local.generation != _generation)
+    if conn is None or stale:
+        if conn is not None:
+            conn.close()
+        conn = _open_connection()
+        _local.conn = conn
+        _local.path = DB_FILE
+        _local.generation = _generation
+        _local.depth = 0
+    return conn
+
+def close_connection():
+    """Closes this thread's connection (a new one is opened on next use)."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+def reopen_connections():
+    """Makes every thread (the writer included) open a fresh connection on next use, e.g. after the database file was replaced."""
+    global _generation
+    _generation += 1
+
+# Bumped after every committed write to user data; readers key caches on it (see cached_data.py)
+_data_version = 0
+_version_lock = threading.Lock()
+
+def get_data_version():
+    """Returns the in-process data version (no database access)."""
+    return _data_version
+
+def _bump_data_version():
+    global _data_version
+    with _version_lock:
+        _data_version += 1
+
+# Bumped after daily snapshots, which only change the history table and leave the data version alone
+_history_version = 0
+
+def get_history_version():
+    """Returns the (data version, history version) pair that history readers key their caches on."""
+    return _data_version, _history_version
+
+def _bump_history_version():
+    global _history_version
+    with _version_lock:
+        _history_version += 1
+
+# Bumped after settings writes, which leave the data version alone as well
+_settings_version = 0
+
+def get_settings_version():
+    """Returns the (data version, settings version) pair that settings readers key their caches on."""
+    return _data_version, _settings_version
 
-def add_transaction(date, type, category, amount, currency, description):
-    """Adds a new transaction to the database."""
+def _bump_settings_version():
+    global _settings_version
+    with _version_lock:
+        _settings_version += 1
+
+@contextmanager
+def transaction(touch=True):
+    """
+    Unit of work: yields a cursor and commits once when the block ends (rolls back on error).
+    Nested blocks join the outermost one, so several calls can commit together:
+
+        with dm.transaction():
+            dm.update_portfolio(...)
+            dm.add_transaction(...)
+
+    Pages should queue such units of work with execute()/submit() so they run on the writer thread.
+    touch: whether changes made here count as user data changes (bumping the data version).
+    Cache tables (quotes, TEFAS snapshot, sync markers) pass touch=False.
+    """
     conn = get_connection()
-    c = conn.cursor()
-    c.execute("INSERT INTO transactions (date, type, category, amount, currency, description) VALUES (?, ?, ?, ?, ?, ?)",
-              (date, type, category, amount, currency, description))
-    conn.commit()
-    conn.close()
+    depth = _local.depth
+    _local.depth = depth + 1
+    if depth == 0:
+        _local.touched = False
+        changes_before = conn.total_changes
+    try:
+        if depth == 0 and not conn.in_transaction:
+            # Take the write lock up front so reads inside the unit of work can't go stale
+            conn.execute("BEGIN IMMEDIATE")
+        yield conn.cursor()
+        if touch:
+            _local.touched = True
+        if depth == 0:
+            conn.commit()
+            if _local.touched and conn.total_changes != changes_before:
+                _bump_data_version()
+    except BaseException:
+        if depth == 0:
+            conn.rollback()
+        raise
+    finally:
+        _local.depth = depth
 
+# --- Single writer
+# Every write runs on one thread that owns the write connection, so concurrent sessions
+# (several phones via run_mobile.py) never race on read-then-write or on the write lock.
+# Writes queued while a batch is being applied are committed together (group commit).
+
+# Upper bound of queued writes applied in one commit
+GROUP_COMMIT_MAX = 64
+
+_write_queue = queue.Queue()
+_writer_lock = threading.Lock()
+_writer_thread = None
+
+def _on_writer_thread():
+    return threading.current_thread() is _writer_thread
+
+def _apply_batch(batch):
+    """
+    Applies queued writes in one unit of work; each runs under a savepoint so a failing one is rolled back alone.
+    Never raises: every future in the batch ends up resolved, so callers can't hang and the writer thread survives.
+    """
+    outcomes = []
+    try:
+        with transaction(touch=False) as c:
+            for future, func, args, kwargs in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                c.execute("SAVEPOINT queued_write")
+                try:
+                    outcomes.append((future, func(*args, **kwargs), None))
+                except BaseException as e:
+                    c.execute("ROLLBACK TO queued_write")
+                    outcomes.append((future, None, e))
+                c.execute("RELEASE queued_write")
+    except BaseException as e:
+        # The unit of work could not be opened, a savepoint failed or the commit failed:
+        # nothing in the batch was written, including writes that had not run yet
+        for future, _, _, _ in batch:
+            if not future.done():
+                future.set_exception(e)
+        return
+    # Callers are only released once their write is committed
+    for future, result, error in outcomes:
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+def _run_writer():
+    while True:
+        batch = [_write_queue.get()]
+        while len(batch) < GROUP_COMMIT_MAX:
+            try:
+                batch.append(_write_queue.get_nowait())
+            except queue.Empty:
+                break
+        _apply_batch(batch)
+
+def _start_writer():
+    global _writer_thread
+    with _writer_lock:
+        if _writer_thread is None or not _writer_thread.is_alive():
+            _writer_thread = threading.Thread(target=_run_writer, name="db-writer", daemon=True)
+            _writer_thread.start()
+
+def submit(func, *args, **kwargs):
+    """
+    Queues func(*args, **kwargs) for the writer thread and returns a concurrent.futures.Future
+    that resolves to its result once the batch containing it has committed.
+    func runs inside the writer's unit of work, so the dm write functions it calls join it:
+
+        dm.submit(lambda: (dm.update_portfolio(...), dm.add_transaction(...))).result()
+    """
+    future = Future()
+    if _on_writer_thread():
+        # Already inside a queued write: run inline (waiting on the queue would deadlock)
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(func(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    _start_writer()
+    _write_queue.put((future, func, args, kwargs))
+    return future
+
+def execute(func, *args, **kwargs):
+    """Runs func on the writer thread and waits until it is committed; returns its result or raises its error."""
+    return submit(func, *args, **kwargs).result()
+
+def writes(func):
+    """
+    Routes calls of a write function through the writer thread and waits for the commit.
+    Calls made on the writer thread or inside the caller's own transaction() run inline.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _on_writer_thread() or getattr(_local, "depth", 0) > 0:
+            return func(*args, **kwargs)
+        return execute(func, *args, **kwargs)
+    return wrapper
+
+# Month bucket holding all-time totals in balance_totals
+TOTALS_ALL = "*"
+
+def _apply_totals(c, where, params=(), sign=1):
+    """
+    Adds (sign=1) or removes (sign=-1) the transactions matching `where` to/from
+    balance_totals, both in their month bucket and in the all-time bucket.
+    Must run inside the same unit of work as the change it mirrors.
+    """
+    for bucket in ("substr(date, 1, 7)", f"'{TOTALS_ALL}'"):
+        c.execute(f"""
+            INSERT INTO balance_totals (currency, month, income, expense)
+            SELECT COALESCE(currency, 'TRY'), {bucket},
+                   ? * SUM(CASE WHEN type = 'Gelir' THEN amount ELSE 0 END),
+                   ? * SUM(CASE WHEN type = 'Gider' THEN amount ELSE 0 END)
+            FROM transactions
+            WHERE {where}
+            GROUP BY 1, 2
+            ON CONFLICT(currency, month) DO UPDATE SET
+                income = income + excluded.income,
+                expense = expense + excluded.expense
+        """, (sign, sign, *params))
+
+@perf.timed("db")
+@writes
+def add_transaction(date, type, category, amount, currency, description, asset_id=None):
+    """
+    Adds a new transaction to the database.
+    asset_id: portfolio id of the holding an investment transaction belongs to.
+    """
+    with transaction() as c:
+        c.execute("INSERT INTO transactions (date, type, category, amount, currency, description, asset_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                  (date, type, category, amount, currency, description, asset_id))
+        _apply_totals(c, "id = ?", (c.lastrowid,))
+
+# Columns that identify an imported row's content (used for deduplication)
+IMPORT_HASH_COLUMNS = ["date", "type", "category", "amount", "currency", "description"]
+
+@perf.timed("db")
+@writes
+def import_transactions(df):
+    """
+    Bulk-inserts mapped statement rows (IMPORT_HASH_COLUMNS + import_hash) in one unit of work.
+    Rows whose import_hash already exists are skipped. Returns the number of rows inserted.
+    """
+    if df.empty:
+        return 0
+    # The unique index only covers the SQLite table; check archived months' hashes too
+    months = set(df['date'].str[:7]) & set(get_archive_months())
+    if months:
+        import modules.archive as archive
+        df = df[~df['import_hash'].isin(archive.read(columns=["import_hash"], months=months)['import_hash'])]
+    columns = IMPORT_HASH_COLUMNS + ["import_hash"]
+    rows = df[columns].astype(object).itertuples(index=False, name=None)
+    with transaction() as c, _bulk_fts_insert(c) as last_id:
+        c.executemany(f"INSERT OR IGNORE INTO transactions ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", rows)
+        inserted = c.rowcount
+        _apply_totals(c, "id > ?", (last_id,))
+    return inserted
+
+@perf.timed("db")
 def get_transactions():
     """Returns all transactions as a DataFrame."""
     conn = get_connection()
     df = pd.read_sql_query("SELECT * FROM transactions ORDER BY date DESC", conn)
-    conn.close()
     return df
 
-def get_portfolio():
-    """Returns current portfolio holdings."""
+def _transaction_filters(filters):
+    """Builds WHERE clauses and params from a filters dict (start_date, end_date, type, category)."""
+    filters = filters or {}
+    clauses, params = [], []
+    if filters.get("start_date"):
+        clauses.append("date >= ?")
+        params.append(str(filters["start_date"]))
+    if filters.get("end_date"):
+        clauses.append("date <= ?")
+        params.append(str(filters["end_date"]))
+    if filters.get("type"):
+        clauses.append("type = ?")
+        params.append(filters["type"])
+    if filters.get("category"):
+        clauses.append("category = ?")
+        params.append(filters["category"])
+    return clauses, params
+
+@perf.timed("db")
+def get_transactions_page(after_key=None, limit=50, filters=None, include_archive=True):
+    """
+    Returns one page of transactions, newest first, as (DataFrame, next_key).
+    Keyset pagination on (date, id): pass the returned next_key as after_key to get
+    the following page. next_key is None on the last page.
+    filters: optional dict with start_date, end_date, type and category.
+    include_archive: continue into archived months (see archive.py) once the page reaches them.
+    """
+    clauses, params = _transaction_filters(filters)
+    if after_key is not None:
+        clauses.append("(date, id) < (?, ?)")
+        params.extend(after_key)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
     conn = get_connection()
-    df = pd.read_sql_query("SELECT * FROM portfolio", conn)
-    conn.close()
-    return df
+    # Fetch one extra row to know whether another page exists
+    df = pd.read_sql_query(f"SELECT * FROM transactions {where} ORDER BY date DESC, id DESC LIMIT ?",
+                           conn, params=(*params, limit + 1))
+    # Archived rows are older than the last archived month; only read them once the page gets there
+    archived = get_archive_months() if include_archive else []
+    if archived and (len(df) <= limit or df['date'].iloc[-1][:7] <= archived[-1]):
+        import modules.archive as archive
+        older = archive.read_page(after_key, limit + 1, filters)
+        df = pd.concat([df, older], ignore_index=True).sort_values(["date", "id"], ascending=False).head(limit + 1)
+        df = df.reset_index(drop=True)
+    next_key = None
+    if len(df) > limit:
+        df = df.iloc[:limit]
+        next_key = (df['date'].iloc[-1], int(df['id'].iloc[-1]))
+    return df, next_key
+
+def _fts_query(text):
+    """Turns free text into an FTS5 query: every word must match, as a prefix ("mark" finds "Market")."""
+    words = text.replace("ı", "i").split()
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in words)
 
-def update_portfolio(asset_type, symbol, quantity, price, action):
+# Above this many matches results are listed newest first instead of by relevance:
+# BM25 has to score every match, while rowid order stops after one page
+RANKED_MAX_MATCHES = 5000
+
+@perf.timed("db")
+def search_transactions(text, limit=50, offset=0):
     """
-    Updates portfolio based on Buy/Sell action.
-    action: 'Buy' or 'Sell'
+    Full-text search over description and category. Best matches come first (BM25, then newest);
+    broad queries with more than RANKED_MAX_MATCHES matches are listed newest first.
+    Returns (DataFrame of one page of transactions, total number of matches).
+    Archived transactions are not searched.
     """
+    query = _fts_query(text)
+    if not query:
+        return pd.DataFrame(), 0
     conn = get_connection()
     c = conn.cursor()
-    
-    # Check if asset exists
-    c.execute("SELECT id, quantity, avg_cost FROM portfolio WHERE symbol = ?", (symbol,))
-    row = c.fetchone()
-    
+    c.execute("SELECT COUNT(*) FROM transactions_fts WHERE transactions_fts MATCH ?", (query,))
+    total = c.fetchone()[0]
+    order = "f.rank, t.date DESC, t.id DESC" if total <= RANKED_MAX_MATCHES else "f.rowid DESC"
+    df = pd.read_sql_query(f"""
+        SELECT t.* FROM transactions_fts f
+        JOIN transactions t ON t.id = f.rowid
+        WHERE transactions_fts MATCH ?
+        ORDER BY {order}
+        LIMIT ? OFFSET ?
+    """, conn, params=(query, limit, offset))
+    return df, total
+
+@perf.timed("db")
+def get_categories():
+    """Returns the distinct transaction categories, sorted."""
+    c = get_connection().cursor()
+    c.execute("""
+        SELECT category FROM transactions WHERE category IS NOT NULL AND category != ''
+        UNION
+        SELECT category FROM archive_summary WHERE category IS NOT NULL AND category != ''
+        ORDER BY category
+    """)
+    return [row[0] for row in c.fetchall()]
+
+@perf.timed("db")
+def get_portfolio():
+    """Returns current portfolio holdings (closed positions are left out)."""
+    conn = get_connection()
+    df = pd.read_sql_query("SELECT * FROM portfolio WHERE quantity > 0", conn)
+    return df
+
+# A holdings checkpoint is written every this many trades of an asset
+CHECKPOINT_EVERY = 50
+
+def _apply_trade(qty, avg, action, quantity, price):
+    """Returns (quantity, avg_cost) after applying one trade to a position."""
     if action == "Buy":
-        if row:
-            # Update existing
-            curr_id, curr_qty, curr_avg = row
-            new_qty = curr_qty + quantity
-            # Weighted Average Cost
-            new_avg = ((curr_qty * curr_avg) + (quantity * price)) / new_qty
-            c.execute("UPDATE portfolio SET quantity = ?, avg_cost = ? WHERE id = ?", (new_qty, new_avg, curr_id))
-        else:
-            # Insert new
-            c.execute("INSERT INTO portfolio (asset_type, symbol, quantity, avg_cost) VALUES (?, ?, ?, ?)",
-                      (asset_type, symbol, quantity, price))
-                      
-    elif action == "Sell":
-        if row:
-            curr_id, curr_qty, curr_avg = row
-            if quantity >= curr_qty:
-                # Sold all
-                c.execute("DELETE FROM portfolio WHERE id = ?", (curr_id,))
-            else:
-                # Reduce quantity (Avg Cost doesn't change on sell)
-                new_qty = curr_qty - quantity
-                c.execute("UPDATE portfolio SET quantity = ? WHERE id = ?", (new_qty, curr_id))
-        else:
+        new_qty = qty + quantity
+        # Weighted Average Cost
+        new_avg = ((qty * avg) + (quantity * price)) / new_qty if new_qty else price
+        return new_qty, new_avg
+    if action == "Sell":
+        # Avg Cost doesn't change on sell; no shorting
+        return max(qty - quantity, 0.0), avg
+    # 'Adjust': manual correction sets the position directly
+    return quantity, price
+
+def _nearest_checkpoint(c, asset_id, date):
+    """Returns (trade_date, trade_id, quantity, avg_cost) of the latest checkpoint on or before date, or None."""
+    c.execute("""
+        SELECT trade_date, trade_id, quantity, avg_cost FROM holding_checkpoints
+        WHERE asset_id = ? AND trade_date <= ?
+        ORDER BY trade_date DESC, trade_id DESC LIMIT 1
+    """, (asset_id, date))
+    return c.fetchone()
+
+def _replay_trades(c, asset_id, checkpoint, until_date=None):
+    """Yields (trade_date, trade_id, quantity, avg_cost) for each trade after the checkpoint, in order."""
+    qty, avg = (checkpoint[2], checkpoint[3]) if checkpoint else (0.0, 0.0)
+    after = (checkpoint[0], checkpoint[1]) if checkpoint else ("", 0)
+    c.execute("""
+        SELECT id, date, action, quantity, price FROM trades
+        WHERE asset_id = ? AND (date, id) > (?, ?) AND date <= ?
+        ORDER BY date, id
+    """, (asset_id, *after, until_date or "9999-12-31"))
+    for trade_id, trade_date, action, quantity, price in c.fetchall():
+        qty, avg = _apply_trade(qty, avg, action, quantity, price)
+        yield trade_date, trade_id, qty, avg
+
+def _rebuild_position(c, asset_id, from_date):
+    """
+    Recomputes an asset's position from the nearest checkpoint before from_date,
+    rewriting later checkpoints and the cached portfolio row.
+    """
+    # Checkpoints from from_date on no longer account for the changed trade
+    c.execute("DELETE FROM holding_checkpoints WHERE asset_id = ? AND trade_date >= ?", (asset_id, from_date))
+    checkpoint = _nearest_checkpoint(c, asset_id, from_date)
+    qty, avg = (checkpoint[2], checkpoint[3]) if checkpoint else (0.0, 0.0)
+    new_checkpoints = []
+    for i, (trade_date, trade_id, qty, avg) in enumerate(_replay_trades(c, asset_id, checkpoint), 1):
+        if i % CHECKPOINT_EVERY == 0:
+            new_checkpoints.append((asset_id, trade_date, trade_id, qty, avg))
+    c.executemany("""
+        INSERT INTO holding_checkpoints (asset_id, trade_date, trade_id, quantity, avg_cost)
+        VALUES (?, ?, ?, ?, ?)
+    """, new_checkpoints)
+    c.execute("UPDATE portfolio SET quantity = ?, avg_cost = ? WHERE id = ?", (qty, avg, asset_id))
+
+def _record_trade(c, asset_id, date, action, quantity, price):
+    """Appends a trade to the ledger and refreshes the asset's position."""
+    date = str(date or datetime.date.today())
+    c.execute("INSERT INTO trades (asset_id, date, action, quantity, price) VALUES (?, ?, ?, ?, ?)",
+              (asset_id, date, action, quantity, price))
+    _rebuild_position(c, asset_id, date)
+
+@perf.timed("db")
+@writes
+def update_portfolio(asset_type, symbol, quantity, price, action, date=None):
+    """
+    Records a Buy/Sell trade in the ledger and updates the portfolio row (a cache of the latest position).
+    action: 'Buy' or 'Sell'
+    date: trade date (defaults to today); back-dated trades are replayed in date order.
+    Returns the portfolio id of the asset (None when selling something not held).
+    """
+    with transaction() as c:
+        if action == "Buy":
+            # Upsert the asset (position is filled in by the trade below)
+            c.execute("""
+                INSERT INTO portfolio (asset_type, symbol, quantity, avg_cost) VALUES (?, ?, 0, ?)
+                ON CONFLICT(symbol) DO NOTHING
+            """, (asset_type, symbol, price))
+        c.execute("SELECT id FROM portfolio WHERE symbol = ?", (symbol,))
+        row = c.fetchone()
+        if row is None:
             # Selling something we don't have? 
             # For now, ignore or maybe allow shorting? Let's assume no shorting.
-            pass
-            
-    conn.commit()
-    conn.close()
+            return None
+
+        asset_id = row[0]
+        _record_trade(c, asset_id, date, action, quantity, price)
+        return asset_id
+
+def get_position(asset_id, date):
+    """Returns (quantity, avg_cost) of an asset at the end of the given date, from the nearest checkpoint forward."""
+    c = get_connection().cursor()
+    date = str(date)
+    checkpoint = _nearest_checkpoint(c, asset_id, date)
+    qty, avg = (checkpoint[2], checkpoint[3]) if checkpoint else (0.0, 0.0)
+    for _, _, qty, avg in _replay_trades(c, asset_id, checkpoint, until_date=date):
+        pass
+    return qty, avg
+
+def get_holdings_at(date):
+    """Returns the position of every asset at the end of the given date as a DataFrame."""
+    assets = pd.read_sql_query("SELECT id, asset_type, symbol FROM portfolio", get_connection())
+    positions = [get_position(asset_id, date) for asset_id in assets['id']]
+    assets['quantity'] = [qty for qty, _ in positions]
+    assets['avg_cost'] = [avg for _, avg in positions]
+    return assets[assets['quantity'] > 0].reset_index(drop=True)
+
+def get_position_history():
+    """
+    Returns every asset's position at the end of each day it traded, replayed from the ledger,
+    as a DataFrame (date, asset_id, symbol, asset_type, quantity, price) where price is the day's last trade price.
+    """
+    trades = pd.read_sql_query("""
+        SELECT t.asset_id, p.symbol, p.asset_type, t.date, t.action, t.quantity, t.price
+        FROM trades t JOIN portfolio p ON p.id = t.asset_id
+        ORDER BY t.asset_id, t.date, t.id
+    """, get_connection())
+    positions = {}
+    quantities = []
+    for asset_id, action, quantity, price in zip(trades['asset_id'], trades['action'], trades['quantity'], trades['price']):
+        qty, avg = _apply_trade(*positions.get(asset_id, (0.0, 0.0)), action, quantity, price)
+        positions[asset_id] = (qty, avg)
+        quantities.append(qty)
+    trades['quantity'] = quantities
+    trades = trades.drop_duplicates(['asset_id', 'date'], keep='last')
+    return trades[['date', 'asset_id', 'symbol', 'asset_type', 'quantity', 'price']].reset_index(drop=True)
+
+@perf.timed("db")
+def get_trades(asset_id=None):
+    """Returns ledger trades (optionally for one asset) in date order as a DataFrame."""
+    conn = get_connection()
+    query = """
+        SELECT t.id, t.asset_id, p.symbol, t.date, t.action, t.quantity, t.price
+        FROM trades t JOIN portfolio p ON p.id = t.asset_id
+    """
+    if asset_id is None:
+        return pd.read_sql_query(query + " ORDER BY t.date, t.id", conn)
+    return pd.read_sql_query(query + " WHERE t.asset_id = ? ORDER BY t.date, t.id", conn, params=(asset_id,))
 
+@perf.timed("db")
+@writes
 def delete_transaction(trans_id):
     """Deletes a transaction by ID."""
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("DELETE FROM transactions WHERE id = ?", (trans_id,))
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        _apply_totals(c, "id = ?", (trans_id,), sign=-1)
+        c.execute("DELETE FROM transactions WHERE id = ?", (trans_id,))
 
+@perf.timed("db")
+@writes
 def update_transaction(trans_id, date, type, category, amount, currency, description):
     """Updates an existing transaction."""
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("""
-        UPDATE transactions 
-        SET date = ?, type = ?, category = ?, amount = ?, currency = ?, description = ?
-        WHERE id = ?
-    """, (date, type, category, amount, currency, description, trans_id))
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        _apply_totals(c, "id = ?", (trans_id,), sign=-1)
+        c.execute("""
+            UPDATE transactions 
+            SET date = ?, type = ?, category = ?, amount = ?, currency = ?, description = ?
+            WHERE id = ?
+        """, (date, type, category, amount, currency, description, trans_id))
+        _apply_totals(c, "id = ?", (trans_id,))
 
+@perf.timed("db")
+@writes
 def delete_portfolio_asset(asset_id):
     """Deletes a portfolio asset by ID and removes associated transactions."""
-    conn = get_connection()
-    c = conn.cursor()
-    
-    # Get symbol first
-    c.execute("SELECT symbol FROM portfolio WHERE id = ?", (asset_id,))
-    row = c.fetchone()
-    
-    if row:
-        symbol = row[0]
-        # Delete from portfolio
+    with transaction() as c:
+        # Delete associated transactions first (linked through asset_id) so the
+        # running totals are updated; the foreign key would otherwise cascade them
+        _apply_totals(c, "asset_id = ?", (asset_id,), sign=-1)
+        c.execute("DELETE FROM transactions WHERE asset_id = ?", (asset_id,))
         c.execute("DELETE FROM portfolio WHERE id = ?", (asset_id,))
-        
-        # Delete associated transactions (Investment type, description contains symbol)
-        # We look for descriptions starting with "{symbol} " (e.g. "BTC Alış", "BTC Satış")
-        # This prevents accidental deletion of "BTC-USD" when deleting "BTC" if we just used LIKE '%symbol%'
-        c.execute("DELETE FROM transactions WHERE category = 'Yatırım' AND description LIKE ?", (f"{symbol} %",))
-        
-    conn.commit()
-    conn.close()
 
-def edit_portfolio_asset(asset_id, quantity, avg_cost):
-    """Directly edits a portfolio asset's quantity and average cost (for corrections)."""
+def get_asset_transactions(asset_id):
+    """Returns the investment transactions of a portfolio asset as a DataFrame."""
     conn = get_connection()
-    c = conn.cursor()
-    c.execute("UPDATE portfolio SET quantity = ?, avg_cost = ? WHERE id = ?", (quantity, avg_cost, asset_id))
-    conn.commit()
-    conn.close()
+    df = pd.read_sql_query("SELECT * FROM transactions WHERE asset_id = ? ORDER BY date DESC", conn, params=(asset_id,))
+    return df
+
+@perf.timed("db")
+@writes
+def edit_portfolio_asset(asset_id, quantity, avg_cost):
+    """Directly edits a portfolio asset's quantity and average cost (for corrections), recorded as an 'Adjust' trade."""
+    with transaction() as c:
+        _record_trade(c, asset_id, None, "Adjust", quantity, avg_cost)
+
+# Last snapshot written by this process, to skip identical re-saves on every dashboard rerun
+_last_snapshot = None
 
+@writes
+def _save_snapshot(date, net_worth, cash_balance, portfolio_value):
+    # Not a user data change: only the history readers are invalidated (see save_daily_snapshot)
+    with transaction(touch=False) as c:
+        c.execute("""
+            INSERT INTO history (date, net_worth, cash_balance, portfolio_value)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(date) DO UPDATE SET
+                net_worth = excluded.net_worth,
+                cash_balance = excluded.cash_balance,
+                portfolio_value = excluded.portfolio_value
+        """, (date, net_worth, cash_balance, portfolio_value))
+
+@perf.timed("db")
 def save_daily_snapshot(date, net_worth, cash_balance, portfolio_value):
-    """Saves or updates the daily net worth snapshot."""
+    """Saves or updates the daily net worth snapshot (no-op if unchanged since the last save)."""
+    global _last_snapshot
+    snapshot = (str(date), round(float(net_worth), 2), round(float(cash_balance), 2), round(float(portfolio_value), 2))
+    # Checked before queuing so dashboard reruns don't wait on the writer
+    if snapshot == _last_snapshot:
+        return
+    _save_snapshot(date, net_worth, cash_balance, portfolio_value)
+    # The queued write has committed by now
+    _bump_history_version()
+    _last_snapshot = snapshot
+
+@writes
+def save_history(df):
+    """Bulk upserts net worth snapshots from a DataFrame (date, net_worth, cash_balance, portfolio_value)."""
+    rows = df[['date', 'net_worth', 'cash_balance', 'portfolio_value']].astype(object).itertuples(index=False, name=None)
+    with transaction() as c:
+        c.executemany("""
+            INSERT OR REPLACE INTO history (date, net_worth, cash_balance, portfolio_value)
+            VALUES (?, ?, ?, ?)
+        """, rows)
+
+def get_daily_cash_flows():
+    """Returns net cash flow (income - expense) per day and currency as a DataFrame (date, currency, net)."""
     conn = get_connection()
-    c = conn.cursor()
-    # UPSERT logic: Insert or Replace
-    c.execute("""
-        INSERT OR REPLACE INTO history (date, net_worth, cash_balance, portfolio_value)
-        VALUES (?, ?, ?, ?)
-    """, (date, net_worth, cash_balance, portfolio_value))
-    conn.commit()
-    conn.close()
-
-def get_history():
-    """Returns historical net worth data."""
+    df = pd.read_sql_query("""
+        SELECT date, COALESCE(currency, 'TRY') AS currency,
+               SUM(CASE WHEN type = 'Gelir' THEN amount WHEN type = 'Gider' THEN -amount ELSE 0 END) AS net
+        FROM transactions
+        GROUP BY date, currency
+        ORDER BY date
+    """, conn)
+    if get_archive_months():
+        import modules.archive as archive
+        archived = archive.read(columns=["date", "type", "amount", "currency"])
+        archived['currency'] = archived['currency'].fillna("TRY")
+        archived['net'] = archived['amount'].where(archived['type'] == "Gelir", 0) - archived['amount'].where(archived['type'] == "Gider", 0)
+        df = (pd.concat([df, archived[['date', 'currency', 'net']]])
+              .groupby(['date', 'currency'], as_index=False)['net'].sum()
+              .sort_values('date', kind="stable", ignore_index=True))
+    return df
+
+# Category of the daily interest income rows (see modules/accrual.py)
+INTEREST_CATEGORY = "Faiz"
+
+@perf.timed("db")
+def get_last_accrual_date():
+    """Returns the date (YYYY-MM-DD) of the latest interest accrual, or None."""
+    return _last_accrual_date(get_connection().cursor())
+
+def _last_accrual_date(c):
+    c.execute("SELECT MAX(date) FROM transactions WHERE category = ?", (INTEREST_CATEGORY,))
+    last_date = c.fetchone()[0]
+    if last_date is None:
+        # All accruals may have been archived
+        c.execute("SELECT MAX(month) FROM archive_summary WHERE category = ?", (INTEREST_CATEGORY,))
+        month = c.fetchone()[0]
+        if month:
+            import modules.archive as archive
+            last_date = archive.read({"category": INTEREST_CATEGORY}, columns=["date"], months=[month])['date'].max()
+    return last_date
+
+@perf.timed("db")
+@writes
+def add_accruals(df):
+    """
+    Inserts daily interest rows (date, amount, description) as TRY income in one unit of work.
+    Days up to the latest existing accrual are skipped, so two sessions can't accrue a day twice.
+    Returns the number of rows inserted.
+    """
+    with transaction() as c:
+        last_date = _last_accrual_date(c)
+        if last_date:
+            df = df[df['date'] > last_date]
+        if df.empty:
+            return 0
+        with _bulk_fts_insert(c) as last_id:
+            c.executemany(
+                "INSERT INTO transactions (date, type, category, amount, currency, description) VALUES (?, 'Gelir', ?, ?, 'TRY', ?)",
+                ((date, INTEREST_CATEGORY, amount, description)
+                 for date, amount, description in df[['date', 'amount', 'description']].astype(object).itertuples(index=False, name=None)),
+            )
+            _apply_totals(c, "id > ?", (last_id,))
+    return len(df)
+
+@perf.timed("db")
+def get_history(start_date=None, end_date=None):
+    """Returns historical net worth data, optionally only within [start_date, end_date] (uses the date key)."""
+    conn = get_connection()
+    clauses, params = [], []
+    if start_date:
+        clauses.append("date >= ?")
+        params.append(str(start_date))
+    if end_date:
+        clauses.append("date <= ?")
+        params.append(str(end_date))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    df = pd.read_sql_query(f"SELECT * FROM history {where} ORDER BY date ASC", conn, params=params)
+    return df
+
+@perf.timed("db")
+def get_balance_totals():
+    """
+    Returns all-time income, expense and balance per currency as a DataFrame
+    (read from the running totals, independent of the number of transactions).
+    """
+    conn = get_connection()
+    df = pd.read_sql_query("""
+        SELECT currency, income, expense, income - expense AS balance
+        FROM balance_totals WHERE month = ?
+    """, conn, params=(TOTALS_ALL,))
+    return df
+
+@perf.timed("db")
+def get_monthly_totals():
+    """Returns income, expense and balance per month and currency as a DataFrame."""
+    conn = get_connection()
+    df = pd.read_sql_query("""
+        SELECT month, currency, income, expense, income - expense AS balance
+        FROM balance_totals WHERE month != ? ORDER BY month ASC
+    """, conn, params=(TOTALS_ALL,))
+    return df
+
+# Rollup dimension -> SQL expression
+ROLLUP_DIMENSIONS = {
+    "category": "category",
+    "type": "type",
+    "currency": "currency",
+    "month": "substr(date, 1, 7)",
+}
+
+@perf.timed("db")
+def get_rollup(dimensions, filters=None):
+    """
+    Aggregates transactions in SQL: SUM(amount) and COUNT(*) grouped by the given dimensions
+    (any of ROLLUP_DIMENSIONS). filters: same dict as get_transactions_page.
+    Returns a DataFrame (dimensions..., total, count) ordered by the dimensions.
+    """
+    dimensions = list(dimensions)
+    unknown = [d for d in dimensions if d not in ROLLUP_DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Unknown rollup dimensions: {', '.join(unknown)}")
+    clauses, params = _transaction_filters(filters)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    select = ", ".join(f"{ROLLUP_DIMENSIONS[d]} AS {d}" for d in dimensions)
+    group = ", ".join(dimensions)
+
     conn = get_connection()
-    df = pd.read_sql_query("SELECT * FROM history ORDER BY date ASC", conn)
-    conn.close()
+    df = pd.read_sql_query(f"""
+        SELECT {select}{', ' if dimensions else ''}SUM(amount) AS total, COUNT(*) AS count
+        FROM transactions {where}
+        {f'GROUP BY {group} ORDER BY {group}' if dimensions else ''}
+    """, conn, params=params)
+    if get_archive_months():
+        import modules.archive as archive
+        df = pd.concat([df, archive.rollup(dimensions, filters)], ignore_index=True)
+        if dimensions:
+            df = df.groupby(dimensions, dropna=False, as_index=False)[['total', 'count']].sum()
+        else:
+            df = pd.DataFrame({"total": [df['total'].sum()], "count": [int(df['count'].sum())]})
     return df
 
+def get_archive_months():
+    """Returns the archived months ('YYYY-MM'), oldest first."""
+    c = get_connection().cursor()
+    c.execute("SELECT DISTINCT month FROM archive_summary ORDER BY month")
+    return [row[0] for row in c.fetchall()]
+
+@perf.timed("db")
+def get_archive_stats():
+    """Returns (rows in the transactions table, archived rows, archived months)."""
+    c = get_connection().cursor()
+    c.execute("SELECT COUNT(*) FROM transactions")
+    hot_rows = c.fetchone()[0]
+    c.execute("SELECT COALESCE(SUM(count), 0), COUNT(DISTINCT month) FROM archive_summary")
+    archived_rows, months = c.fetchone()
+    return hot_rows, archived_rows, months
+
+def check_totals():
+    """
+    Compares the running totals with a full recomputation from transactions.
+    Returns a list of (currency, month, stored, expected) tuples that differ (empty if consistent).
+    """
+    c = get_connection().cursor()
+    c.execute("SELECT currency, month, income, expense FROM balance_totals")
+    stored = {(cur, month): (inc, exp) for cur, month, inc, exp in c.fetchall()}
+    # Archived transactions still count; their per-month sums are kept in archive_summary
+    c.execute(f"""
+        WITH amounts AS (
+            SELECT currency, substr(date, 1, 7) AS month, type, amount FROM transactions
+            UNION ALL
+            SELECT currency, month, type, total FROM archive_summary
+        )
+        SELECT COALESCE(currency, 'TRY'), bucket,
+               SUM(CASE WHEN type = 'Gelir' THEN amount ELSE 0 END),
+               SUM(CASE WHEN type = 'Gider' THEN amount ELSE 0 END)
+        FROM (SELECT *, month AS bucket FROM amounts
+              UNION ALL
+              SELECT *, '{TOTALS_ALL}' AS bucket FROM amounts)
+        GROUP BY 1, 2
+    """)
+    expected = {(cur, month): (inc, exp) for cur, month, inc, exp in c.fetchall()}
+
+    mismatches = []
+    for key in stored.keys() | expected.keys():
+        s_inc, s_exp = stored.get(key, (0.0, 0.0))
+        e_inc, e_exp = expected.get(key, (0.0, 0.0))
+        if abs(s_inc - e_inc) > 0.005 or abs(s_exp - e_exp) > 0.005:
+            mismatches.append((key[0], key[1], (s_inc, s_exp), (e_inc, e_exp)))
+    return sorted(mismatches)
+
+@writes
+def rebuild_totals():
+    """Recomputes balance_totals from scratch out of the transactions table and the archive summary."""
+    with transaction() as c:
+        c.execute("DELETE FROM balance_totals")
+        _apply_totals(c, "1 = 1")
+        for bucket in ("month", f"'{TOTALS_ALL}'"):
+            c.execute(f"""
+                INSERT INTO balance_totals (currency, month, income, expense)
+                SELECT COALESCE(currency, 'TRY'), {bucket},
+                       SUM(CASE WHEN type = 'Gelir' THEN total ELSE 0 END),
+                       SUM(CASE WHEN type = 'Gider' THEN total ELSE 0 END)
+                FROM archive_summary
+                GROUP BY 1, 2
+                ON CONFLICT(currency, month) DO UPDATE SET
+                    income = income + excluded.income,
+                    expense = expense + excluded.expense
+            """)
+
+@perf.timed("db")
+def get_price_cache():
+    """Returns all persisted quotes as (provider, symbol, price, fetched_at) tuples."""
+    c = get_connection().cursor()
+    c.execute("SELECT provider, symbol, price, fetched_at FROM price_cache")
+    rows = c.fetchall()
+    return rows
+
+@writes
+def save_price_cache(entries):
+    """Upserts quotes given as (provider, symbol, price, fetched_at) tuples."""
+    with transaction(touch=False) as c:
+        c.executemany("""
+            INSERT OR REPLACE INTO price_cache (provider, symbol, price, fetched_at)
+            VALUES (?, ?, ?, ?)
+        """, entries)
+
+@writes
+def save_tefas_prices(rows):
+    """Upserts TEFAS fund prices given as (code, date, price) tuples."""
+    with transaction(touch=False) as c:
+        c.executemany("INSERT OR REPLACE INTO tefas_prices (code, date, price) VALUES (?, ?, ?)", rows)
+
+@perf.timed("db")
+def get_tefas_prices(codes):
+    """Returns fund code -> latest stored price for the given codes (missing codes are left out)."""
+    codes = list(codes)
+    if not codes:
+        return {}
+    c = get_connection().cursor()
+    placeholders = ",".join("?" * len(codes))
+    c.execute(f"""
+        SELECT t.code, t.price FROM tefas_prices t
+        WHERE t.code IN ({placeholders})
+          AND t.date = (SELECT MAX(date) FROM tefas_prices WHERE code = t.code)
+    """, codes)
+    prices = dict(c.fetchall())
+    return prices
+
+def get_tefas_last_date():
+    """Returns the most recent date stored in the TEFAS snapshot, or None."""
+    c = get_connection().cursor()
+    c.execute("SELECT MAX(date) FROM tefas_prices")
+    row = c.fetchone()
+    return row[0]
+
+@perf.timed("db")
+def get_setting(key, default=None):
+    """Returns a stored setting value (string) or default."""
+    c = get_connection().cursor()
+    c.execute("SELECT value FROM settings WHERE key = ?", (key,))
+    row = c.fetchone()
+    return row[0] if row else default
+
+@writes
+def _save_setting(key, value):
+    with transaction(touch=False) as c:
+        c.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, str(value)))
+
+@perf.timed("db")
+def set_setting(key, value):
+    """Stores a setting value (as string)."""
+    _save_setting(key, value)
+    # The queued write has committed by now
+    _bump_settings_version()
+
 def reset_db():
     """Drops all tables and re-initializes the database."""
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("DROP TABLE IF EXISTS transactions")
-    c.execute("DROP TABLE IF EXISTS portfolio")
-    c.execute("DROP TABLE IF EXISTS history")
-    conn.commit()
-    conn.close()
-    init_db()
+    global _last_snapshot
+    execute(_drop_tables)
+    import modules.archive as archive
+    archive.clear()
+    # DROP TABLE doesn't count as a row change, so invalidate caches explicitly (after the commit)
+    _last_snapshot = None
+    _bump_data_version()
+
+def _drop_tables():
+    with transaction() as c:
+        c.execute("DROP TABLE IF EXISTS transactions")
+        c.execute("DROP TABLE IF EXISTS transactions_fts")
+        c.execute("DROP TABLE IF EXISTS holding_checkpoints")
+        c.execute("DROP TABLE IF EXISTS trades")
+        c.execute("DROP TABLE IF EXISTS portfolio")
+        c.execute("DROP TABLE IF EXISTS history")
+        c.execute("DROP TABLE IF EXISTS balance_totals")
+        c.execute("DROP TABLE IF EXISTS archive_summary")
+        init_db()
@@ -0,0 +1,118 @@
+import csv
+import pandas as pd
+import modules.data_manager as dm
+
+# Rows read, mapped and written per step (keeps memory bounded for large statements)
+CHUNK_SIZE = 5000
+
+# Transaction fields that can be mapped from statement columns
+FIELDS = ["date", "amount", "description", "category", "type", "currency"]
+REQUIRED_FIELDS = ["date", "amount"]
+
+def _is_excel(filename):
+    return filename.lower().endswith((".xlsx", ".xlsm"))
+
+def _sniff_separator(file):
+    """Detects the CSV delimiter from the start of the file (banks use ',' ';' or tab)."""
+    sample = file.read(64 * 1024)
+    file.seek(0)
+    if isinstance(sample, bytes):
+        sample = sample.decode("utf-8", errors="ignore")
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+    except csv.Error:
+        return ","
+
+def read_columns(file, filename):
+    """Returns the header row (column names) of a CSV or Excel statement."""
+    if _is_excel(filename):
+        from openpyxl import load_workbook
+        wb = load_workbook(file, read_only=True, data_only=True)
+        header = next(wb.active.iter_rows(max_row=1, values_only=True), ())
+        wb.close()
+        columns = [str(col) for col in header if col is not None]
+    else:
+        columns = list(pd.read_csv(file, nrows=0, sep=_sniff_separator(file)).columns)
+    file.seek(0)
+    return columns
+
+def read_chunks(file, filename, chunksize=CHUNK_SIZE):
+    """Yields the statement as DataFrames of at most `chunksize` rows (CSV or Excel)."""
+    if _is_excel(filename):
+        from openpyxl import load_workbook
+        # read_only mode streams rows instead of loading the whole sheet
+        wb = load_workbook(file, read_only=True, data_only=True)
+        rows = wb.active.iter_rows(values_only=True)
+        header = [str(col) for col in next(rows, ())]
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunksize:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+        wb.close()
+    else:
+        yield from pd.read_csv(file, chunksize=chunksize, sep=_sniff_separator(file))
+
+def _parse_amounts(values, decimal):
+    """Converts an amount column to floats; with decimal=',' handles Turkish '1.234,56' strings."""
+    if decimal == "," and not pd.api.types.is_numeric_dtype(values):
+        values = values.astype(str).str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    return pd.to_numeric(values, errors="coerce")
+
+def map_chunk(chunk, mapping, dayfirst=True, decimal=",", default_currency="TRY"):
+    """
+    Maps a raw statement chunk to the transactions schema.
+    mapping: field -> statement column (see FIELDS); date and amount are required.
+    Without a type column, negative amounts become 'Gider' and positive ones 'Gelir'.
+    Rows without a valid date or amount are dropped.
+    """
+    out = pd.DataFrame(index=chunk.index)
+    out['date'] = pd.to_datetime(chunk[mapping['date']], dayfirst=dayfirst, errors="coerce").dt.strftime("%Y-%m-%d")
+    amount = _parse_amounts(chunk[mapping['amount']], decimal)
+
+    if mapping.get('type'):
+        out['type'] = chunk[mapping['type']].astype(str)
+    else:
+        out['type'] = amount.lt(0).map({True: "Gider", False: "Gelir"})
+    out['amount'] = amount.abs()
+    out['category'] = chunk[mapping['category']].fillna("").astype(str) if mapping.get('category') else ""
+    out['currency'] = chunk[mapping['currency']].fillna(default_currency).astype(str) if mapping.get('currency') else default_currency
+    out['description'] = chunk[mapping['description']].fillna("").astype(str) if mapping.get('description') else ""
+    return out.dropna(subset=['date', 'amount'])
+
+def content_hashes(df, seen):
+    """
+    Vectorized content hash per row. Identical rows get their occurrence number mixed in,
+    so re-importing a statement is a no-op while genuine repeated rows are kept.
+    seen: Series of content hash -> occurrences in earlier chunks (None for the first chunk).
+    Returns (hashes, updated seen).
+    """
+    base = pd.util.hash_pandas_object(df[dm.IMPORT_HASH_COLUMNS], index=False)
+    occurrence = base.groupby(base).cumcount().astype("uint64")
+    counts = base.value_counts()
+    if seen is not None:
+        occurrence += base.map(seen).fillna(0).astype("uint64")
+        counts = counts.add(seen, fill_value=0).astype("uint64")
+    hashes = pd.util.hash_pandas_object(pd.DataFrame({"base": base, "n": occurrence}), index=False)
+    return hashes.astype("int64"), counts
+
+def import_statement(file, filename, mapping, dayfirst=True, decimal=",", default_currency="TRY", progress=None):
+    """
+    Streams a CSV/XLSX statement into the transactions table chunk by chunk.
+    progress: optional callable receiving (rows_read, rows_inserted) after each chunk.
+    Returns (rows_read, rows_inserted); rows already imported are skipped.
+    """
+    rows_read = 0
+    rows_inserted = 0
+    seen = None
+    for chunk in read_chunks(file, filename):
+        mapped = map_chunk(chunk, mapping, dayfirst, decimal, default_currency)
+        mapped['import_hash'], seen = content_hashes(mapped, seen)
+        rows_read += len(chunk)
+        rows_inserted += dm.import_transactions(mapped)
+        if progress:
+            progress(rows_read, rows_inserted)
+    return rows_read, rows_inserted
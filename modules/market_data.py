@@ -1,10 +1,80 @@
-import yfinance as yf
-from tefas import Crawler
 import pandas as pd
 import datetime
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import modules.data_manager as dm
+import modules.quote_cache as qc
+import modules.price_store as ps
+import modules.perf as perf
+import modules.quote_refresher as qr
 
-def get_tefas_data(fund_code):
-    """Fetches the latest price for a TEFAS fund."""
+# yfinance and tefas are imported inside the functions that call them:
+# they take a few hundred ms to load and most renders are served from the quote cache.
+
+# Upper bound for concurrent TEFAS requests (per-fund fallback crawls)
+TEFAS_MAX_WORKERS = 8
+# How many days back the first bulk TEFAS snapshot reaches (covers weekends/holidays)
+TEFAS_SNAPSHOT_DAYS = 7
+# Seconds between snapshot syncs while the last business day's prices are not published yet
+TEFAS_RESYNC_INTERVAL = 30 * 60
+
+_tefas_sync_lock = threading.Lock()
+
+# All amounts are reported in Turkish Lira
+REPORTING_CURRENCY = "TRY"
+# Yahoo tickers quoting one unit of the currency in TRY
+FX_TICKERS = {
+    "USD": "TRY=X",
+    "EUR": "EURTRY=X",
+}
+
+def _last_business_day(day):
+    """The day itself on weekdays, otherwise the Friday before."""
+    return day - datetime.timedelta(days=max(0, day.weekday() - 4))
+
+def sync_tefas_snapshot(force=False):
+    """
+    Pulls the price table of all TEFAS funds in one crawler call and stores it in
+    the tefas_prices table. The day counts as synced once the snapshot reaches the last
+    business day; until then (TEFAS publishes during the day) it is synced again at most
+    every TEFAS_RESYNC_INTERVAL seconds within TEFAS hours. force=True always syncs.
+    Returns True if a fetch was made.
+    """
+    from tefas import Crawler
+    today = datetime.date.today()
+    with _tefas_sync_lock:
+        if not force:
+            if dm.get_setting("tefas_snapshot_date") == today.isoformat():
+                return False
+            attempted = float(dm.get_setting("tefas_snapshot_attempt", 0))
+            if datetime.date.fromtimestamp(attempted) == today and (
+                    not qr.tefas_open() or time.time() - attempted < TEFAS_RESYNC_INTERVAL):
+                return False
+        dm.set_setting("tefas_snapshot_attempt", time.time())
+        try:
+            # Only fetch the tail we don't have yet
+            start_date = today - datetime.timedelta(days=TEFAS_SNAPSHOT_DAYS)
+            last_date = dm.get_tefas_last_date()
+            if last_date:
+                start_date = max(start_date, datetime.date.fromisoformat(last_date[:10]))
+
+            crawler = Crawler()
+            result = crawler.fetch(start=start_date.strftime("%Y-%m-%d"), end=today.strftime("%Y-%m-%d"), columns=["code", "date", "price"])
+            if result is not None and not result.empty:
+                rows = zip(result['code'], pd.to_datetime(result['date']).dt.strftime("%Y-%m-%d"), result['price'].astype(float))
+                dm.save_tefas_prices(list(rows))
+            last_date = dm.get_tefas_last_date()
+            if last_date and last_date[:10] >= _last_business_day(today).isoformat():
+                dm.set_setting("tefas_snapshot_date", today.isoformat())
+            return True
+        except Exception as e:
+            print(f"Error fetching TEFAS snapshot: {e}")
+            return False
+
+def _fetch_tefas_price(fund_code):
+    """Fetches the latest price for a single TEFAS fund directly from the crawler (uncached)."""
+    from tefas import Crawler
     try:
         crawler = Crawler()
         # Fetch data for the last few days to ensure we get the latest close
@@ -27,8 +97,9 @@ def get_tefas_data(fund_code):
         print(f"Error fetching TEFAS data for {fund_code}: {e}")
         return None
 
-def get_market_price(symbol):
-    """Fetches price for Crypto, Stocks, or Currency from Yahoo Finance."""
+def _fetch_market_price(symbol):
+    """Fetches price for Crypto, Stocks, or Currency from Yahoo Finance (uncached)."""
+    import yfinance as yf
     try:
         # Append -USD for crypto if not present and likely crypto, or assume user provides full ticker
         # For USD/TRY, symbol is 'TRY=X'
@@ -41,6 +112,259 @@ def get_market_price(symbol):
         print(f"Error fetching market data for {symbol}: {e}")
         return None
 
+def get_tefas_data(fund_code):
+    """Returns the latest price for a TEFAS fund, served from the quote cache when possible."""
+    return qc.get_many("tefas", [fund_code], _fetch_tefas_prices)[fund_code]
+
+def get_market_price(symbol):
+    """Returns the latest Yahoo Finance price, served from the quote cache when possible."""
+    return qc.get("yahoo", symbol, _fetch_market_price)
+
 def get_usd_try_rate():
     """Helper to get USD/TRY rate."""
-    return get_market_price("TRY=X")
+    return qc.get("fx", "TRY=X", _fetch_market_price)
+
+def _fetch_tefas_prices(fund_codes):
+    """
+    Looks up several TEFAS funds in the daily snapshot (syncing it first if needed).
+    Funds missing from the snapshot are crawled individually and concurrently.
+    """
+    if not fund_codes:
+        return {}
+    sync_tefas_snapshot()
+    try:
+        prices = dm.get_tefas_prices(fund_codes)
+    except Exception as e:
+        print(f"Error reading TEFAS snapshot: {e}")
+        prices = {}
+    missing = [code for code in fund_codes if code not in prices]
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(TEFAS_MAX_WORKERS, len(missing))) as pool:
+            prices.update(zip(missing, pool.map(_fetch_tefas_price, missing)))
+    return prices
+
+def _download_market_prices(symbols):
+    """Fetches the latest close for several Yahoo symbols in a single download."""
+    import yfinance as yf
+    if not symbols:
+        return {}
+    try:
+        data = yf.download(symbols, period="5d", progress=False, threads=True, auto_adjust=False)
+        if data is None or data.empty:
+            return {}
+        closes = data['Close']
+        # A single ticker may come back as a Series instead of a one-column frame
+        if isinstance(closes, pd.Series):
+            closes = closes.to_frame(name=symbols[0])
+        prices = {}
+        for symbol in symbols:
+            if symbol in closes.columns:
+                series = closes[symbol].dropna()
+                if not series.empty:
+                    prices[symbol] = series.iloc[-1]
+        return prices
+    except Exception as e:
+        print(f"Error fetching market data for {symbols}: {e}")
+        return {}
+
+def get_prices(symbols, funds=None):
+    """
+    Returns latest prices for many symbols at once.
+    symbols: iterable of symbols to price
+    funds: symbols that should be priced from TEFAS instead of Yahoo Finance
+    Returns a dict of symbol -> price (None when a price could not be found).
+    Cached quotes are served immediately; only missing symbols block on the network.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    funds = set(funds if funds is not None else ())
+    tefas_symbols = [s for s in symbols if s in funds]
+    market_symbols = [s for s in symbols if s not in funds]
+
+    prices = dict.fromkeys(symbols)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        # TEFAS funds are fetched alongside the Yahoo bulk download
+        tefas_future = pool.submit(perf.bind(qc.get_many), "tefas", tefas_symbols, _fetch_tefas_prices)
+        prices.update(qc.get_many("yahoo", market_symbols, _download_market_prices))
+        prices.update(tefas_future.result())
+    return prices
+
+def refresh_quotes(symbols, funds=None, include_tefas=True):
+    """
+    Fetches current quotes for the given symbols (plus all FX pairs) and stores them in the
+    quote cache, regardless of freshness. Used by the background refresher.
+    include_tefas=False skips funds that already have a cached quote; otherwise the TEFAS
+    snapshot is synced first. Unchanged fund prices keep their fetch time (see qc.KEEP_UNCHANGED).
+    Returns the number of quotes fetched.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    funds = set(funds if funds is not None else ())
+    market_symbols = [s for s in symbols if s not in funds]
+    tefas_symbols = [s for s in symbols if s in funds]
+    if not include_tefas:
+        tefas_symbols = [s for s in tefas_symbols if qc.get_entry("tefas", s) is None]
+
+    market_prices = qc.fetch("yahoo", market_symbols, _download_market_prices)
+    qc.put_many("yahoo", market_prices)
+    fx_prices = qc.fetch("fx", list(FX_TICKERS.values()), _download_market_prices)
+    qc.put_many("fx", fx_prices)
+    if include_tefas and tefas_symbols:
+        # New fund prices only arrive with a snapshot sync (throttled, see sync_tefas_snapshot)
+        sync_tefas_snapshot()
+    tefas_prices = qc.fetch("tefas", tefas_symbols, _fetch_tefas_prices)
+    qc.put_many("tefas", tefas_prices)
+    return len(market_prices) + len(fx_prices) + len(tefas_prices)
+
+def get_price_times(symbols):
+    """Returns symbol -> datetime of the cached quote used for pricing, for staleness display."""
+    times = qc.get_fetched_at(set(symbols))
+    return {symbol: datetime.datetime.fromtimestamp(ts) for symbol, ts in times.items()}
+
+def get_fx_rates(currencies):
+    """
+    Returns currency -> TRY rate for the given currencies.
+    All pairs are resolved in one call (through the quote cache), so a valuation
+    needs at most one FX request no matter how many assets or transactions it covers.
+    Pairs that cannot be fetched fall back to the last close in the price store;
+    currencies without any known rate are left out.
+    """
+    rates = {REPORTING_CURRENCY: 1.0}
+    tickers = {c: FX_TICKERS[c] for c in set(currencies) if c in FX_TICKERS}
+    if tickers:
+        quotes = qc.get_many("fx", list(tickers.values()), _download_market_prices)
+        for currency, ticker in tickers.items():
+            rate = quotes.get(ticker) or _last_stored_close(ticker)
+            if rate:
+                rates[currency] = float(rate)
+    return rates
+
+def _last_stored_close(symbol):
+    """Last daily close kept in the price store for a symbol, or None."""
+    records = ps.load(symbol)
+    return float(records["close"][-1]) if len(records) else None
+
+def convert_amounts(amounts, currencies, rates):
+    """Converts an amount Series to TRY using a matching currency Series (vectorized). Amounts in a currency without a rate become NaN."""
+    return amounts * currencies.map(rates)
+
+def quote_currencies(assets):
+    """Returns the currency each asset is quoted in (non-fund symbols containing 'USD' are in dollars, the rest in TRY)."""
+    is_fund = assets['asset_type'].str.contains("Fon")
+    return pd.Series(REPORTING_CURRENCY, index=assets.index).mask(~is_fund & assets['symbol'].str.contains("USD"), "USD")
+
+def value_portfolio(portfolio):
+    """
+    Values holdings in TRY in one vectorized pass.
+    Returns a copy of the portfolio with 'current_price' and 'current_value' columns.
+    Symbols containing 'USD' (non-fund) are quoted in dollars and converted;
+    holdings without a live price or rate fall back to avg_cost.
+    """
+    df = portfolio.copy()
+    is_fund = df['asset_type'].str.contains("Fon")
+    prices = get_prices(df['symbol'], funds=df.loc[is_fund, 'symbol'])
+
+    quote_currency = quote_currencies(df)
+    rates = get_fx_rates(quote_currency.unique())
+
+    price = pd.to_numeric(df['symbol'].map(prices), errors='coerce') * quote_currency.map(rates)
+    df['current_price'] = price.where(price > 0).fillna(df['avg_cost'])
+    df['current_value'] = df['quantity'] * df['current_price']
+    return df
+
+def _fetch_tefas_history(fund_code, start_date, end_date):
+    """Fetches a fund's daily prices for a date range as a date-indexed Series (empty on failure)."""
+    from tefas import Crawler
+    try:
+        result = Crawler().fetch(start=start_date.strftime("%Y-%m-%d"), end=end_date.strftime("%Y-%m-%d"), name=fund_code, columns=["code", "date", "price"])
+        if result is not None and not result.empty:
+            return pd.Series(result['price'].astype(float).to_numpy(), index=pd.to_datetime(result['date']))
+    except Exception as e:
+        print(f"Error fetching TEFAS history for {fund_code}: {e}")
+    return pd.Series(dtype=float)
+
+def _download_market_history(symbols, start_date, end_date):
+    """Fetches daily closes for several Yahoo symbols in one download (date-indexed DataFrame)."""
+    import yfinance as yf
+    try:
+        data = yf.download(symbols, start=start_date.strftime("%Y-%m-%d"),
+                           end=(end_date + datetime.timedelta(days=1)).strftime("%Y-%m-%d"),
+                           progress=False, threads=True, auto_adjust=False)
+        if data is None or data.empty:
+            return pd.DataFrame()
+        closes = data['Close']
+        if isinstance(closes, pd.Series):
+            closes = closes.to_frame(name=symbols[0])
+        closes.index = pd.to_datetime(closes.index).tz_localize(None).normalize()
+        return closes
+    except Exception as e:
+        print(f"Error fetching market history for {symbols}: {e}")
+        return pd.DataFrame()
+
+def _synced_range(symbol):
+    """(first, last) day of the range whose closes have been fetched for a symbol, or (None, None)."""
+    synced_to = dm.get_setting(f"history_synced:{symbol}")
+    if not synced_to:
+        return None, None
+    synced_from = dm.get_setting(f"history_synced_from:{symbol}")
+    # Stores synced before the start was recorded fall back to the first stored close
+    first_date = datetime.date.fromisoformat(synced_from) if synced_from else ps.date_range(symbol)[0]
+    if first_date is None:
+        return None, None
+    return first_date, datetime.date.fromisoformat(synced_to)
+
+def _mark_synced(symbol, start_date, end_date):
+    """Extends a symbol's synced range with [start_date, end_date] (always adjacent to or overlapping it)."""
+    synced_from, synced_to = _synced_range(symbol)
+    dm.set_setting(f"history_synced_from:{symbol}", min(start_date, synced_from or start_date).isoformat())
+    dm.set_setting(f"history_synced:{symbol}", max(end_date, synced_to or end_date).isoformat())
+
+def sync_history(symbols, funds, start_date, end_date):
+    """
+    Brings the local price store up to date for [start_date, end_date], fetching only
+    what is missing: the days before and after the range each symbol was synced for
+    (or the whole range for symbols never synced). Symbols sharing a segment go out
+    together as one bulk Yahoo download; TEFAS funds are crawled concurrently.
+    """
+    funds = set(funds)
+    groups = {}
+    for symbol in dict.fromkeys(symbols):
+        synced_from, synced_to = _synced_range(symbol)
+        if synced_to is None:
+            segments = [(start_date, end_date)]
+        else:
+            segments = []
+            if start_date < synced_from:
+                segments.append((start_date, synced_from - datetime.timedelta(days=1)))
+            if end_date > synced_to:
+                segments.append((synced_to + datetime.timedelta(days=1), end_date))
+        for segment in segments:
+            groups.setdefault(segment, []).append(symbol)
+
+    for (fetch_from, fetch_to), group in groups.items():
+        market_symbols = [s for s in group if s not in funds]
+        tefas_symbols = [s for s in group if s in funds]
+        fetched = {}
+        if market_symbols:
+            closes = _download_market_history(market_symbols, fetch_from, fetch_to)
+            fetched.update({s: closes[s].dropna() for s in market_symbols if s in closes.columns})
+        if tefas_symbols:
+            with ThreadPoolExecutor(max_workers=min(TEFAS_MAX_WORKERS, len(tefas_symbols))) as pool:
+                fetched.update(zip(tefas_symbols, pool.map(lambda code: _fetch_tefas_history(code, fetch_from, fetch_to), tefas_symbols)))
+        # An empty answer means "no closes in the segment" (weekends, holidays, before listing) when the
+        # segment has no business day or another symbol got data; otherwise the fetch likely failed
+        answered = any(not series.empty for series in fetched.values()) or len(pd.bdate_range(fetch_from, fetch_to)) == 0
+        for symbol in group:
+            series = fetched.get(symbol, pd.Series(dtype=float))
+            if not series.empty:
+                ps.write(symbol, series.index.to_numpy(), series.to_numpy())
+            elif not answered:
+                # Left unmarked so a failed fetch is retried
+                continue
+            _mark_synced(symbol, fetch_from, fetch_to)
+
+def get_history_closes(symbols, funds, start_date, end_date):
+    """
+    Returns daily closes as a DataFrame indexed by date with one column per symbol,
+    read from the local price store after fetching any missing days.
+    """
+    sync_history(symbols, funds, start_date, end_date)
+    return ps.read_frame(dict.fromkeys(symbols), start_date, end_date)
@@ -0,0 +1,109 @@
+import functools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Optional JSON-lines log of every render (enabled under Ayarlar > Performans)
+LOG_FILE = "perf_log.jsonl"
+
+# Number of past renders kept in memory for the Ayarlar "Performans" section
+RENDER_HISTORY = 100
+
+_lock = threading.Lock()
+_local = threading.local()
+_renders = deque(maxlen=RENDER_HISTORY)
+_log_file = None
+
+def set_log_file(path):
+    """Appends every finished render as one JSON line to `path` (None disables the log)."""
+    global _log_file
+    _log_file = path
+
+def get_log_file():
+    return _log_file
+
+def _current():
+    return getattr(_local, "render", None)
+
+def _public(record):
+    # Drops internal keys (the perf_counter start) before a record leaves the module
+    return {k: v for k, v in record.items() if not k.startswith("_")}
+
+def begin(page):
+    """Starts collecting spans for one script run (rerun) of a page, replacing any unfinished one."""
+    started = time.perf_counter()
+    _local.render = {"ts": time.time(), "page": page, "total_ms": None, "spans": [], "_started": started}
+
+def end():
+    """Finishes the current render and stores it (and logs it, if enabled). Returns the record or None."""
+    record = _current()
+    if record is None:
+        return None
+    record["total_ms"] = round((time.perf_counter() - record["_started"]) * 1000, 3)
+    _local.render = None
+    with _lock:
+        _renders.append(record)
+        if _log_file:
+            try:
+                with open(_log_file, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(_public(record), ensure_ascii=False) + "\n")
+            except OSError as e:
+                print(f"Error writing performance log: {e}")
+    return _public(record)
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Times a block inside the current render; attrs are stored with it (e.g. hits/misses).
+    Outside a render (background threads, scripts) this is a no-op.
+    Yields the attrs dict so the block can add values it only knows at the end.
+    """
+    record = _current()
+    if record is None:
+        yield attrs
+        return
+    started = time.perf_counter()
+    try:
+        yield attrs
+    finally:
+        record["spans"].append({
+            "name": name,
+            "start_ms": round((started - record["_started"]) * 1000, 3),
+            "ms": round((time.perf_counter() - started) * 1000, 3),
+            **attrs,
+        })
+
+def timed(category):
+    """Decorator recording each call as a span named '<category>.<function name>'."""
+    def decorator(func):
+        name = f"{category}.{func.__name__}"
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def bind(func):
+    """Wraps func so spans recorded in another thread (e.g. a pool worker) go to the caller's render."""
+    record = _current()
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        previous = _current()
+        _local.render = record
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.render = previous
+    return wrapper
+
+def get_renders():
+    """Returns the recorded renders, oldest first (each: ts, page, total_ms, spans)."""
+    with _lock:
+        return [_public(r) for r in _renders]
+
+def clear():
+    with _lock:
+        _renders.clear()
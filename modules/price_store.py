@@ -0,0 +1,81 @@
+import os
+import threading
+from urllib.parse import quote
+import numpy as np
+import pandas as pd
+import modules.data_manager as dm
+
+# Each file is a date-sorted structured array
+RECORD_DTYPE = np.dtype([("date", "datetime64[D]"), ("close", "f8")])
+
+_lock = threading.Lock()
+
+def get_dir():
+    """Directory next to the database file holding one memory-mapped .npy file of daily closes per symbol."""
+    return os.path.splitext(dm.DB_FILE)[0] + "_price_history"
+
+def _path(symbol):
+    # Symbols like 'TRY=X' or 'BTC-USD' are escaped into safe file names
+    return os.path.join(get_dir(), quote(symbol, safe="") + ".npy")
+
+def load(symbol):
+    """Returns the stored records of a symbol as a read-only memory-mapped array (empty if none)."""
+    path = _path(symbol)
+    if not os.path.exists(path):
+        return np.empty(0, dtype=RECORD_DTYPE)
+    return np.load(path, mmap_mode="r")
+
+def date_range(symbol):
+    """Returns (first_date, last_date) stored for a symbol as datetime.date, or (None, None)."""
+    records = load(symbol)
+    if len(records) == 0:
+        return None, None
+    return records["date"][0].item(), records["date"][-1].item()
+
+def write(symbol, dates, closes):
+    """
+    Merges daily closes into a symbol's file (new values win on overlapping dates).
+    dates: array-like of dates; closes: matching floats. NaN closes are skipped.
+    """
+    new = np.empty(len(dates), dtype=RECORD_DTYPE)
+    new["date"] = np.asarray(dates, dtype="datetime64[D]")
+    new["close"] = np.asarray(closes, dtype="f8")
+    new = new[~np.isnan(new["close"])]
+    if len(new) == 0:
+        return
+    with _lock:
+        existing = np.array(load(symbol))
+        merged = np.concatenate([new, existing])
+        # np.unique keeps the first occurrence, i.e. the newly written value
+        _, first = np.unique(merged["date"], return_index=True)
+        merged = merged[first]
+        os.makedirs(get_dir(), exist_ok=True)
+        path = _path(symbol)
+        tmp_path = path + ".tmp.npy"
+        np.save(tmp_path, merged)
+        os.replace(tmp_path, path)
+
+def read(symbol, start_date, end_date):
+    """Returns (dates, closes) NumPy arrays for a symbol within [start_date, end_date] (slices of the mmap)."""
+    records = load(symbol)
+    lo = np.searchsorted(records["date"], np.datetime64(start_date, "D"), side="left")
+    hi = np.searchsorted(records["date"], np.datetime64(end_date, "D"), side="right")
+    return records["date"][lo:hi], records["close"][lo:hi]
+
+def read_matrix(symbols, start_date, end_date):
+    """
+    Returns (dates, matrix) where dates is the sorted union of stored dates in the range and
+    matrix[i, j] is the close of symbols[j] on dates[i] (NaN where that symbol has no close).
+    """
+    series = [read(symbol, start_date, end_date) for symbol in symbols]
+    dates = np.unique(np.concatenate([d for d, _ in series])) if series else np.empty(0, dtype="datetime64[D]")
+    matrix = np.full((len(dates), len(symbols)), np.nan)
+    for j, (symbol_dates, closes) in enumerate(series):
+        matrix[np.searchsorted(dates, symbol_dates), j] = closes
+    return dates, matrix
+
+def read_frame(symbols, start_date, end_date):
+    """read_matrix wrapped in a date-indexed DataFrame with one column per symbol."""
+    symbols = list(symbols)
+    dates, matrix = read_matrix(symbols, start_date, end_date)
+    return pd.DataFrame(matrix, index=pd.DatetimeIndex(dates.astype("datetime64[ns]")), columns=symbols)
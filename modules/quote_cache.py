@@ -0,0 +1,265 @@
+import threading
+import time
+from collections import OrderedDict
+
+import modules.data_manager as dm
+import modules.perf as perf
+
+# Seconds a quote stays fresh, per provider.
+# TEFAS publishes one price per day, FX moves every minute.
+PROVIDER_TTL = {
+    "tefas": 6 * 60 * 60,
+    "yahoo": 5 * 60,
+    "fx": 60,
+}
+DEFAULT_TTL = 5 * 60
+
+# Providers publishing one price per day: storing an unchanged price keeps its first fetch time,
+# so staleness shows when the price was last seen to change rather than when it was re-read
+KEEP_UNCHANGED = {"tefas"}
+
+# Maximum number of quotes kept in memory (least recently used are evicted)
+MAX_ENTRIES = 512
+
+# A symbol that returns no price is skipped for a backoff that doubles per consecutive failure
+FAILURE_BACKOFF = 60
+MAX_FAILURE_BACKOFF = 60 * 60
+
+# After this many failed calls in a row a provider is skipped for BREAKER_COOLDOWN seconds
+BREAKER_THRESHOLD = 3
+BREAKER_COOLDOWN = 5 * 60
+
+# FX quotes come from Yahoo Finance, so they share its breaker and counters
+UPSTREAM = {"fx": "yahoo"}
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # (provider, symbol) -> (price, fetched_at)
+_loaded = False
+_refreshing = set()
+_failures = {}  # (provider, symbol) -> (consecutive failures, retry_at)
+_breakers = {}  # upstream -> {"failures": consecutive failed calls, "open_until": Unix time}
+_stats = {}  # upstream -> call / failure / latency counters
+
+def _load():
+    """Warm start: fills the memory cache from the price_cache table once per process."""
+    global _loaded
+    if _loaded:
+        return
+    try:
+        rows = dm.get_price_cache()
+    except Exception as e:
+        # Table may not exist yet (init_db not called); start cold
+        print(f"Error loading price cache: {e}")
+        rows = []
+    for provider, symbol, price, fetched_at in rows:
+        _entries[(provider, symbol)] = (price, fetched_at)
+    while len(_entries) > MAX_ENTRIES:
+        _entries.popitem(last=False)
+    _loaded = True
+
+def clear():
+    """Drops all in-memory quotes and failure state; the next read reloads from price_cache."""
+    global _loaded
+    with _lock:
+        _entries.clear()
+        _failures.clear()
+        _breakers.clear()
+        _loaded = False
+
+def is_fresh(provider, fetched_at):
+    """True if a quote fetched at `fetched_at` is still within its provider TTL."""
+    return time.time() - fetched_at < PROVIDER_TTL.get(provider, DEFAULT_TTL)
+
+def get_entry(provider, symbol):
+    """Returns (price, fetched_at) for a cached quote, fresh or stale, or None."""
+    with _lock:
+        _load()
+        key = (provider, symbol)
+        entry = _entries.get(key)
+        if entry is not None:
+            _entries.move_to_end(key)
+        return entry
+
+def put_many(provider, prices):
+    """
+    Stores fetched prices (symbol -> price) in memory and in the database. None values are skipped,
+    as are unchanged prices of KEEP_UNCHANGED providers (their entries keep the original fetch time).
+    """
+    now = time.time()
+    rows = [(provider, symbol, float(price), now) for symbol, price in prices.items() if price is not None]
+    with _lock:
+        _load()
+        if provider in KEEP_UNCHANGED:
+            rows = [row for row in rows if _entries.get((provider, row[1]), (None,))[0] != row[2]]
+        if not rows:
+            return
+        for provider_, symbol, price, fetched_at in rows:
+            _entries[(provider_, symbol)] = (price, fetched_at)
+            _entries.move_to_end((provider_, symbol))
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+    try:
+        dm.save_price_cache(rows)
+    except Exception as e:
+        print(f"Error saving price cache: {e}")
+
+def _upstream(provider):
+    return UPSTREAM.get(provider, provider)
+
+def _new_stats():
+    return {"calls": 0, "failures": 0, "symbols_failed": 0, "latency_total": 0.0, "last_latency": None, "last_error": None}
+
+def is_available(provider):
+    """False while the provider's circuit breaker is open."""
+    with _lock:
+        breaker = _breakers.get(_upstream(provider))
+        return breaker is None or time.time() >= breaker["open_until"]
+
+def fetch(provider, symbols, fetch_many):
+    """
+    Calls fetch_many for symbols, skipping symbols still in their failure backoff and
+    the whole call while the provider's breaker is open. Records latency and failure counters.
+    A call counts as a provider failure when it raises, or when it returns nothing although
+    one of the symbols has been priced before (so a single bad symbol can't trip the breaker).
+    Returns symbol -> price for the symbols that were fetched.
+    """
+    now = time.time()
+    upstream = _upstream(provider)
+    with _lock:
+        breaker = _breakers.setdefault(upstream, {"failures": 0, "open_until": 0.0})
+        if now < breaker["open_until"]:
+            return {}
+        symbols = [s for s in symbols if now >= _failures.get((provider, s), (0, 0.0))[1]]
+        known = any((provider, s) in _entries for s in symbols)
+    if not symbols:
+        return {}
+
+    error = None
+    started = time.perf_counter()
+    with perf.span(f"{provider}.fetch", symbols=len(symbols)) as span:
+        try:
+            fetched = fetch_many(symbols) or {}
+        except Exception as e:
+            print(f"Error fetching {provider} quotes {symbols}: {e}")
+            fetched, error = {}, str(e)
+        span["failed"] = sum(fetched.get(s) is None for s in symbols)
+    latency = time.perf_counter() - started
+
+    prices = {s: fetched[s] for s in symbols if fetched.get(s) is not None}
+    failed = [s for s in symbols if s not in prices]
+    with _lock:
+        stats = _stats.setdefault(upstream, _new_stats())
+        stats["calls"] += 1
+        stats["latency_total"] += latency
+        stats["last_latency"] = latency
+        stats["symbols_failed"] += len(failed)
+        for symbol in prices:
+            _failures.pop((provider, symbol), None)
+        for symbol in failed:
+            count = _failures.get((provider, symbol), (0, 0.0))[0] + 1
+            _failures[(provider, symbol)] = (count, now + min(FAILURE_BACKOFF * 2 ** (count - 1), MAX_FAILURE_BACKOFF))
+
+        if prices:
+            breaker["failures"] = 0
+        elif error or known:
+            stats["failures"] += 1
+            stats["last_error"] = error or f"No prices returned for {', '.join(symbols)}"
+            breaker["failures"] += 1
+            # Stays tripped after the cool-down, so one more failure re-opens it right away
+            if breaker["failures"] >= BREAKER_THRESHOLD:
+                breaker["open_until"] = now + BREAKER_COOLDOWN
+    return prices
+
+def get_stats():
+    """
+    Returns upstream -> counters: calls, failures (failed calls), symbols_failed,
+    avg_latency / last_latency (seconds), last_error and open_until (Unix time, None if closed).
+    """
+    now = time.time()
+    with _lock:
+        result = {}
+        for upstream in set(_stats) | set(_breakers):
+            stats = dict(_stats.get(upstream, _new_stats()))
+            stats["avg_latency"] = stats.pop("latency_total") / stats["calls"] if stats["calls"] else None
+            open_until = _breakers.get(upstream, {}).get("open_until", 0.0)
+            stats["open_until"] = open_until if open_until > now else None
+            result[upstream] = stats
+        return result
+
+def get_failing_symbols():
+    """Returns (provider, symbol, consecutive failures, retry_at) for symbols in backoff."""
+    with _lock:
+        return [(provider, symbol, count, retry_at) for (provider, symbol), (count, retry_at) in _failures.items()]
+
+def reset_failures():
+    """Clears failure backoffs and closes all breakers (counters are kept)."""
+    with _lock:
+        _failures.clear()
+        _breakers.clear()
+
+def _refresh(provider, symbols, fetch_many):
+    try:
+        put_many(provider, fetch(provider, symbols, fetch_many))
+    except Exception as e:
+        print(f"Error refreshing {provider} quotes {symbols}: {e}")
+    finally:
+        with _lock:
+            _refreshing.difference_update((provider, s) for s in symbols)
+
+def _refresh_in_background(provider, symbols, fetch_many):
+    """Starts one background refresh for symbols that are not already being refreshed."""
+    with _lock:
+        symbols = [s for s in symbols if (provider, s) not in _refreshing]
+        _refreshing.update((provider, s) for s in symbols)
+    if symbols:
+        threading.Thread(target=_refresh, args=(provider, symbols, fetch_many), daemon=True).start()
+
+def get_many(provider, symbols, fetch_many):
+    """
+    Stale-while-revalidate lookup for several symbols.
+    fetch_many: callable taking a list of symbols and returning a symbol -> price dict.
+    Fresh quotes are returned directly, stale ones are returned immediately while a
+    background refresh runs, and missing ones are fetched synchronously (see fetch()).
+    """
+    with perf.span(f"{provider}.quotes") as span:
+        prices, stale, missing = _lookup(provider, symbols, fetch_many)
+        span.update(hits=len(prices) - len(stale) - len(missing), stale=len(stale), misses=len(missing))
+    return prices
+
+def _lookup(provider, symbols, fetch_many):
+    """get_many without the span; returns (prices, stale symbols, missing symbols)."""
+    prices = {}
+    missing = []
+    stale = []
+    for symbol in symbols:
+        entry = get_entry(provider, symbol)
+        if entry is None:
+            missing.append(symbol)
+            continue
+        prices[symbol] = entry[0]
+        if not is_fresh(provider, entry[1]):
+            stale.append(symbol)
+
+    if stale:
+        _refresh_in_background(provider, stale, fetch_many)
+    if missing:
+        # Failing symbols and providers are skipped here; callers fall back to avg_cost
+        fetched = fetch(provider, missing, fetch_many)
+        put_many(provider, fetched)
+        for symbol in missing:
+            prices[symbol] = fetched.get(symbol)
+    return prices, stale, missing
+
+def get(provider, symbol, fetch):
+    """Single-symbol version of get_many. fetch: callable taking a symbol and returning a price."""
+    return get_many(provider, [symbol], lambda symbols: {s: fetch(s) for s in symbols})[symbol]
+
+def get_fetched_at(symbols, provider=None):
+    """Returns symbol -> fetch timestamp (Unix time) of the cached quote, for staleness display."""
+    times = {}
+    with _lock:
+        _load()
+        for (provider_, symbol), (_, fetched_at) in _entries.items():
+            if symbol in symbols and (provider is None or provider_ == provider):
+                times[symbol] = fetched_at
+    return times
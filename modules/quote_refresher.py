@@ -0,0 +1,91 @@
+import datetime
+import threading
+import time
+import modules.data_manager as dm
+
+# Seconds between refreshes (overridable in Ayarlar, stored in settings)
+DEFAULT_INTERVAL = 5 * 60
+MIN_INTERVAL = 60
+
+# TEFAS publishes fund prices on weekdays during these hours (Istanbul time, UTC+3)
+TEFAS_HOURS = (9, 19)
+ISTANBUL_TZ = datetime.timezone(datetime.timedelta(hours=3))
+
+_lock = threading.Lock()
+_wake = threading.Event()
+_thread = None
+_status = {
+    "last_run": None,
+    "last_error": None,
+    "symbols": 0,
+    "quotes": 0,
+    "runs": 0,
+}
+
+def is_enabled():
+    return dm.get_setting("refresher_enabled", "1") == "1"
+
+def get_interval():
+    """Returns the refresh interval in seconds."""
+    return max(MIN_INTERVAL, int(dm.get_setting("refresher_interval", DEFAULT_INTERVAL)))
+
+def configure(enabled, interval):
+    """Stores refresher settings and wakes the thread so they apply immediately."""
+    dm.set_setting("refresher_enabled", "1" if enabled else "0")
+    dm.set_setting("refresher_interval", max(MIN_INTERVAL, int(interval)))
+    _wake.set()
+
+def tefas_open(now=None):
+    """True while TEFAS may publish new prices (weekdays within TEFAS_HOURS)."""
+    now = now or datetime.datetime.now(ISTANBUL_TZ)
+    return now.weekday() < 5 and TEFAS_HOURS[0] <= now.hour < TEFAS_HOURS[1]
+
+def refresh_once():
+    """
+    Refreshes quotes for every symbol in the portfolio table into the quote cache.
+    Outside TEFAS hours only funds without any cached quote are fetched.
+    Returns the number of quotes stored.
+    """
+    # Imported here so starting the thread doesn't load yfinance/tefas before the first page is drawn
+    import modules.market_data as md
+    portfolio = dm.get_portfolio()
+    is_fund = portfolio['asset_type'].str.contains("Fon")
+    quotes = md.refresh_quotes(portfolio['symbol'], funds=portfolio.loc[is_fund, 'symbol'], include_tefas=tefas_open())
+    with _lock:
+        _status.update(last_run=time.time(), last_error=None, symbols=len(portfolio), quotes=quotes)
+        _status["runs"] += 1
+    return quotes
+
+def _run():
+    while True:
+        if is_enabled():
+            try:
+                refresh_once()
+            except Exception as e:
+                print(f"Error refreshing quotes: {e}")
+                with _lock:
+                    _status.update(last_run=time.time(), last_error=str(e))
+        _wake.wait(get_interval())
+        _wake.clear()
+
+def start():
+    """Starts the refresher thread once per process (later calls are no-ops)."""
+    global _thread
+    with _lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_run, name="quote-refresher", daemon=True)
+            _thread.start()
+    return _thread
+
+def refresh_now():
+    """Asks the refresher thread to run immediately."""
+    _wake.set()
+
+def get_status():
+    """Returns a copy of the refresher status (last_run is Unix time or None)."""
+    with _lock:
+        status = dict(_status)
+    status["running"] = _thread is not None and _thread.is_alive()
+    status["enabled"] = is_enabled()
+    status["interval"] = get_interval()
+    return status
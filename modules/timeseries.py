@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+# Chart resolutions: label -> pandas period (None keeps daily points)
+RESOLUTIONS = {
+    "daily": None,
+    "weekly": "W",
+    "monthly": "M",
+}
+
+# Ranges longer than these many days are aggregated automatically
+WEEKLY_AFTER_DAYS = 366
+MONTHLY_AFTER_DAYS = 3 * 366
+
+# Default upper bound of points sent to the browser per series
+MAX_POINTS = 500
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling: returns the indices of n_out points
+    (always including the first and last) that best keep the visual shape of y over x.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # n_out - 2 buckets between the fixed first and last point
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    indices = np.empty(n_out, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        # Third vertex: the average of the next bucket
+        avg_x = x[hi:next_hi].mean()
+        avg_y = y[hi:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        indices[i + 1] = a
+    return indices
+
+def auto_resolution(start_date, end_date):
+    """Picks daily, weekly or monthly points for a date range."""
+    days = (pd.Timestamp(end_date) - pd.Timestamp(start_date)).days
+    if days > MONTHLY_AFTER_DAYS:
+        return "monthly"
+    if days > WEEKLY_AFTER_DAYS:
+        return "weekly"
+    return "daily"
+
+def last_per_period(df, period, date_column="date"):
+    """Keeps the last row of each period (e.g. 'W', 'M'); suited to level series like net worth."""
+    periods = pd.to_datetime(df[date_column]).dt.to_period(period)
+    return df.groupby(periods.to_numpy(), sort=False).tail(1)
+
+def reduce_series(df, value_column, resolution="auto", max_points=MAX_POINTS, date_column="date"):
+    """
+    Prepares a date-sorted series for charting: aggregates to the resolution
+    ('auto', 'daily', 'weekly', 'monthly') and then downsamples with LTTB to max_points.
+    Returns (reduced DataFrame, resolution used).
+    """
+    if df.empty:
+        return df, "daily"
+    if resolution == "auto":
+        resolution = auto_resolution(df[date_column].iloc[0], df[date_column].iloc[-1])
+    period = RESOLUTIONS[resolution]
+    if period:
+        df = last_per_period(df, period, date_column)
+    if len(df) > max_points:
+        x = pd.to_datetime(df[date_column]).to_numpy().astype("datetime64[D]").astype(np.int64)
+        df = df.iloc[lttb_indices(x, df[value_column].to_numpy(), max_points)]
+    return df.reset_index(drop=True), resolution
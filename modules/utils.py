@@ -1,6 +1,57 @@
-def format_currency(amount):
-    """Formats a number as Turkish currency string: 1.234,56"""
-    try:
-        return "{:,.2f}".format(amount).replace(",", "X").replace(".", ",").replace("X", ".")
-    except:
-        return str(amount)
+import numpy as np
+import pandas as pd
+
+# Swaps the English separators produced by format() to Turkish ones
+_TR_SEPARATORS = str.maketrans(",.", ".,")
+
+def _format_numbers(values, decimals=2, signed=False):
+    """
+    Formats a whole Series Turkish-style (1.234.567,89) in one pass over the raw floats,
+    with the same rounding as format(). NaN becomes an empty string.
+    """
+    values = pd.to_numeric(values, errors="coerce")
+    spec = f"{'+' if signed else ''},.{decimals}f"
+    text = [format(v, spec).translate(_TR_SEPARATORS) if v == v else "" for v in values.tolist()]
+    return pd.Series(text, index=values.index)
+
+def _apply(values, formatter):
+    # Scalars in, scalar out; arrays and Series keep their shape
+    if np.isscalar(values) or values is None:
+        return formatter(pd.Series([values]))[0]
+    if isinstance(values, pd.Series):
+        return formatter(values)
+    return formatter(pd.Series(values)).to_numpy()
+
+def format_number(values, decimals=2, signed=False):
+    """Formats a number, Series or array Turkish-style: 1.234,56"""
+    return _apply(values, lambda s: _format_numbers(s, decimals, signed))
+
+def format_currency(amount, symbol=None, decimals=2):
+    """Formats a number, Series or array as Turkish currency: 1.234,56 (plus ' ₺' etc. if symbol is given)"""
+    suffix = f" {symbol}" if symbol else ""
+    return _apply(amount, lambda s: (_format_numbers(s, decimals) + suffix).mask(s.isna(), ""))
+
+def format_percent(values, decimals=2, signed=False):
+    """Formats percentages Turkish-style with a leading sign: %12,34 (values are already in percent)"""
+    return _apply(values, lambda s: _format_numbers(s, decimals, signed).str.replace(r"^([+-]?)(?=\d)", r"\1%", regex=True))
+
+# st.dataframe column configs: numbers stay numeric (sortable, no server-side strings)
+# and are formatted by the browser in the user's locale (1.234,56 for Turkish).
+def money_column(label, symbol="₺"):
+    import streamlit as st
+    return st.column_config.NumberColumn(f"{label} ({symbol})" if symbol else label, format="localized")
+
+def number_column(label):
+    import streamlit as st
+    return st.column_config.NumberColumn(label, format="localized")
+
+def date_column(label):
+    import streamlit as st
+    return st.column_config.DateColumn(label, format="DD-MM-YYYY")
+
+def transaction_columns():
+    """Column configs for a transactions table with upper-cased column names."""
+    return {
+        "DATE": date_column("DATE"),
+        "AMOUNT": number_column("AMOUNT"),
+    }
@@ -0,0 +1,118 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+import datetime
+import json
+import modules.data_manager as dm
+import modules.cached_data as cd
+import modules.accrual as accrual
+import modules.perf as perf
+import modules.timeseries as ts
+import modules.utils as utils
+
+DEFAULT_RATE = 50.0
+DEFAULT_TAX = 5.0
+
+def _load_schedule():
+    """Rate schedule stored in settings as [[start date, annual rate %], ...]."""
+    stored = cd.get_setting("interest_schedule")
+    rows = json.loads(stored) if stored else [[datetime.date.today().isoformat(), DEFAULT_RATE]]
+    return pd.DataFrame({
+        "BAŞLANGIÇ": pd.to_datetime([start for start, _ in rows]).date,
+        "YILLIK FAİZ (%)": [float(rate) for _, rate in rows],
+    })
+
+def render():
+    """Faiz Hesapla: daily interest on the cash balance, accrual of missed days and projections."""
+    st.title("🧮 Faiz Getirisi Hesapla")
+
+    # Calculate current cash balance for default value
+    total_income, total_expense = cd.get_cash_totals()
+    current_cash = total_income - total_expense
+    if pd.isna(current_cash):
+        st.warning("Bazı döviz kurları alınamadığı için nakit bakiyesi hesaplanamadı; ana parayı elle giriniz.")
+        current_cash = 0.0
+
+    col1, col2 = st.columns(2)
+    with col1:
+        # User requested: "ana para her zaman kullanıcının elinde olan kalan toplam para olacak"
+        cash = st.number_input("ANA PARA (TL)", min_value=0.0, step=1000.0, value=float(current_cash))
+    with col2:
+        tax_rate = st.number_input("STOPAJ ORANI (%)", min_value=0.0, max_value=100.0, value=float(cd.get_setting("interest_tax", DEFAULT_TAX)))
+
+    # Rate changes over time; each row applies from its start date on
+    st.markdown("##### Faiz Oranı Takvimi")
+    # The editor replays its edits on top of this base table, so it is loaded once per session
+    if "interest_schedule_base" not in st.session_state:
+        st.session_state["interest_schedule_base"] = _load_schedule()
+    edited = st.data_editor(st.session_state["interest_schedule_base"], num_rows="dynamic", hide_index=True, use_container_width=True, column_config={
+        "BAŞLANGIÇ": st.column_config.DateColumn("BAŞLANGIÇ", format="DD-MM-YYYY", required=True),
+        "YILLIK FAİZ (%)": st.column_config.NumberColumn("YILLIK FAİZ (%)", min_value=0.0, max_value=100.0, required=True),
+    }, key="interest_schedule")
+    edited = edited.dropna()
+    if edited.empty:
+        st.warning("En az bir faiz oranı giriniz.")
+        return
+    schedule = list(zip(edited["BAŞLANGIÇ"], edited["YILLIK FAİZ (%)"]))
+
+    # Keep the schedule and tax for the next visit (only written when changed)
+    stored = json.dumps([[str(start), float(rate)] for start, rate in schedule])
+    if stored != cd.get_setting("interest_schedule"):
+        dm.set_setting("interest_schedule", stored)
+    if str(tax_rate) != cd.get_setting("interest_tax", str(DEFAULT_TAX)):
+        dm.set_setting("interest_tax", tax_rate)
+
+    today = datetime.date.today()
+    daily_return = accrual.accrue(cash, today, today, schedule, tax_rate)['interest'].iloc[0]
+    st.metric(label="Günlük Net Getiri", value=utils.format_currency(daily_return, "₺"))
+
+    # --- Missed days ---
+    # Every day since the last 'Faiz' row (or just today) is accrued in one pass and one insert
+    last_date = cd.get_last_accrual_date()
+    start = datetime.date.fromisoformat(last_date) + datetime.timedelta(days=1) if last_date else today
+    if start <= today:
+        missing = accrual.accrue(cash, start, today, schedule, tax_rate)
+        st.caption(f"{utils.format_number(len(missing), 0)} gün için {utils.format_currency(missing['interest'].sum(), '₺')} faiz getirisi henüz eklenmedi"
+                   + (f" (son ekleme: {datetime.date.fromisoformat(last_date).strftime('%d-%m-%Y')})." if last_date else "."))
+        if st.button("📅 Eksik Günlerin Getirisini Gelir Olarak Ekle"):
+            rows = pd.DataFrame({
+                "date": missing['date'].dt.strftime("%Y-%m-%d"),
+                "amount": missing['interest'],
+                "description": "Günlük Faiz Getirisi (%" + missing['annual_rate'].astype(str) + ")",
+            })
+            added = dm.add_accruals(rows)
+            st.success(f"{utils.format_number(added, 0)} gün için {utils.format_currency(rows['amount'].tail(added).sum())} TL faiz geliri eklendi!")
+    else:
+        st.info("Faiz getirisi bugüne kadar eklendi.")
+
+    # --- Projection ---
+    st.markdown("---")
+    st.subheader("PROJEKSİYON")
+    years = st.slider("Süre (Yıl)", min_value=1, max_value=30, value=5)
+    projection = accrual.accrue(cash, today + datetime.timedelta(days=1), pd.Timestamp(today) + pd.DateOffset(years=years), schedule, tax_rate)
+
+    p1, p2 = st.columns(2)
+    p1.metric("DÖNEM SONU BAKİYE", utils.format_currency(projection['balance'].iloc[-1], "₺"))
+    p2.metric("TOPLAM NET GETİRİ", utils.format_currency(projection['interest'].sum(), "₺"))
+
+    points, _ = ts.reduce_series(projection[['date', 'balance']], 'balance')
+    with perf.span("chart.projection", points=len(points)):
+        fig = px.line(points, x='date', y='balance')
+        fig.update_layout(
+            margin=dict(t=30, b=0, l=0, r=0),
+            height=300,
+            xaxis_title=None,
+            yaxis_title=None,
+            separators=",."
+        )
+        fig.update_xaxes(tickformat="%d-%m-%Y")
+        fig.update_yaxes(tickformat=",.")
+        st.plotly_chart(fig, use_container_width=True)
+
+    yearly = accrual.yearly_summary(projection)
+    yearly.columns = ["YIL", "NET GETİRİ", "YIL SONU BAKİYE"]
+    st.dataframe(yearly, column_config={
+        "YIL": st.column_config.NumberColumn("YIL", format="%d"),
+        "NET GETİRİ": utils.money_column("NET GETİRİ"),
+        "YIL SONU BAKİYE": utils.money_column("YIL SONU BAKİYE"),
+    }, use_container_width=True, hide_index=True)
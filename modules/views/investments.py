@@ -0,0 +1,185 @@
+import streamlit as st
+import pandas as pd
+import datetime
+import modules.data_manager as dm
+import modules.cached_data as cd
+import modules.perf as perf
+import modules.utils as utils
+
+def render():
+    """Yatırımlarım: buy/sell assets and the valued portfolio."""
+    st.title("📈 Portföy ve Yatırımlar")
+    
+    # --- Investment Actions ---
+    with st.expander("Yatırım İşlemi Yap (Al/Sat)", expanded=False):
+        st.markdown("##### 1. Varlık Seçimi ve Fiyat")
+        # Inputs outside form to allow interaction (Price Fetch)
+        c1, c2, c3 = st.columns([2, 2, 1])
+        with c1:
+            asset_type = st.selectbox("Varlık Tipi", ["Fon (TEFAS)", "Kripto/Borsa", "Döviz/Altın"])
+        with c2:
+            symbol = st.text_input("Sembol (Örn: TCD, BTC-USD, TRY=X)")
+        with c3:
+            st.write("") # Spacer for alignment
+            st.write("") 
+            if st.button("Fiyat Getir", use_container_width=True):
+                if symbol:
+                    import modules.market_data as md
+                    try:
+                        fetched_price = 0
+                        with st.spinner('Fiyat çekiliyor...'):
+                            if "Fon" in asset_type:
+                                fetched_price = md.get_tefas_data(symbol)
+                            else:
+                                fetched_price = md.get_market_price(symbol)
+                                if "USD" in symbol:
+                                    usd_rate = md.get_usd_try_rate()
+                                    fetched_price = fetched_price * usd_rate if fetched_price and usd_rate else 0
+                        
+                        if fetched_price:
+                            st.session_state['last_price'] = fetched_price
+                            st.success(f"Fiyat: {utils.format_currency(fetched_price)} TL")
+                        else:
+                            st.error("Bulunamadı")
+                    except Exception as e:
+                        st.error(f"Hata: {e}")
+                else:
+                    st.warning("Sembol giriniz")
+
+        st.markdown("##### 2. İşlem Detayları")
+        with st.form("invest_form"):
+            f1, f2, f3, f4 = st.columns(4)
+            with f1:
+                action = st.selectbox("İşlem", ["Alış", "Satış"])
+            with f2:
+                date = st.date_input("Tarih", datetime.date.today(), format="DD-MM-YYYY")
+            with f3:
+                quantity = st.number_input("Adet", min_value=0.0, step=0.01)
+            with f4:
+                # Use session state for price value
+                default_price = st.session_state.get('last_price', 0.0)
+                price = st.number_input("Birim Fiyat (TL)", min_value=0.0, step=0.01, value=float(default_price), format="%.2f")
+                
+            submitted = st.form_submit_button("İşlemi Onayla", type="primary", use_container_width=True)
+            
+            if submitted:
+                if quantity > 0 and price > 0 and symbol:
+                    total_amount = quantity * price
+                    
+                    def record_trade(trade, t_type, label):
+                        asset_id = dm.update_portfolio(asset_type, symbol, quantity, price, trade, date=date)
+                        dm.add_transaction(date, t_type, "Yatırım", total_amount, "TRY", f"{symbol} {label}", asset_id=asset_id)
+                    
+                    if action == "Alış":
+                        # Portfolio update and cash movement commit together on the writer thread
+                        dm.execute(record_trade, "Buy", "Gider", "Alış")
+                        st.success(f"{symbol} alındı ve portföye eklendi.")
+                        
+                    elif action == "Satış":
+                        dm.execute(record_trade, "Sell", "Gelir", "Satış")
+                        st.success(f"{symbol} satıldı ve gelir kaydedildi.")
+                else:
+                    st.error("Lütfen miktar, fiyat ve sembol bilgilerini kontrol ediniz.")
+
+    # --- Edit/Delete Assets ---
+    with st.expander("Varlık Düzenle / Sil (Hata Düzeltme)", expanded=False):
+        p_df = cd.get_portfolio()
+        if not p_df.empty:
+            p_df['label'] = p_df.apply(lambda x: f"{x['id']} | {x['symbol']} | Adet: {x['quantity']} | Ort.Mal: {x['avg_cost']}", axis=1)
+            selected_asset_label = st.selectbox("Varlık Seçiniz", p_df['label'])
+            
+            if selected_asset_label:
+                sel_id = int(selected_asset_label.split(" | ")[0])
+                sel_row = p_df[p_df['id'] == sel_id].iloc[0]
+                
+                # Ledger history of the selected asset
+                trades_df = cd.get_trades(sel_id)
+                if not trades_df.empty:
+                    st.caption("İşlem Geçmişi")
+                    st.dataframe(trades_df[['date', 'action', 'quantity', 'price']].rename(columns=str.upper), use_container_width=True, hide_index=True)
+                
+                with st.form("edit_asset_form"):
+                    c1, c2 = st.columns(2)
+                    with c1:
+                        new_qty = st.number_input("Adet", min_value=0.0, step=0.01, value=float(sel_row['quantity']))
+                    with c2:
+                        new_avg = st.number_input("Ortalama Maliyet (TL)", min_value=0.0, step=0.01, value=float(sel_row['avg_cost']))
+                        
+                    col_up, col_del = st.columns(2)
+                    with col_up:
+                        up_sub = st.form_submit_button("Güncelle")
+                    with col_del:
+                        del_sub = st.form_submit_button("Sil", type="primary")
+                        
+                    if up_sub:
+                        dm.edit_portfolio_asset(sel_id, new_qty, new_avg)
+                        st.success("Varlık güncellendi!")
+                        st.rerun()
+                        
+                    if del_sub:
+                        dm.delete_portfolio_asset(sel_id)
+                        st.warning("Varlık silindi!")
+                        st.rerun()
+        else:
+            st.info("Düzenlenecek varlık yok.")
+
+    # --- Portfolio View ---
+    st.subheader("Mevcut Portföy")
+    with st.spinner('Fiyatlar çekiliyor...'):
+        valued = cd.get_valued_portfolio()
+    
+    if not valued.empty:
+        import modules.market_data as md
+        import modules.quote_cache as qc
+        
+        cost_basis = valued['quantity'] * valued['avg_cost']
+        profit_loss = valued['current_value'] - cost_basis
+        profit_loss_pct = (profit_loss / cost_basis * 100).where(valued['avg_cost'] > 0, 0)
+        
+        # Create DataFrame
+        res_df = pd.DataFrame({
+            "Sembol": valued['symbol'],
+            "Adet": valued['quantity'],
+            "Ort. Maliyet": valued['avg_cost'],
+            "Anlık Fiyat": valued['current_price'],
+            "Toplam Değer": valued['current_value'],
+            "K/Z (TL)": profit_loss,
+            "K/Z (%)": profit_loss_pct
+        })
+        
+        # Calculate Totals for Summary (Moved above table)
+        total_value = res_df["Toplam Değer"].sum()
+        total_pl = res_df["K/Z (TL)"].sum()
+        total_pl_pct = (total_pl / (total_value - total_pl)) * 100 if (total_value - total_pl) != 0 else 0
+
+        # Display Summary Metrics
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Toplam Portföy Değeri", utils.format_currency(total_value, "₺"))
+        col2.metric("Toplam Kar/Zarar (TL)", utils.format_currency(total_pl, "₺"))
+        col3.metric("Toplam Kar/Zarar (%)", utils.format_percent(total_pl_pct))
+
+        # Rename columns to UPPERCASE as requested
+        res_df.columns = [col.upper() for col in res_df.columns]
+        
+        # Raw numbers with column formats: no per-cell string formatting on the server
+        with perf.span("table.portfolio"):
+            st.dataframe(res_df, column_config={
+                "ADET": utils.number_column("ADET"),
+                "ORT. MALIYET": utils.money_column("ORT. MALIYET"),
+                "ANLIK FIYAT": utils.money_column("ANLIK FIYAT"),
+                "TOPLAM DEĞER": utils.money_column("TOPLAM DEĞER"),
+                "K/Z (TL)": utils.number_column("K/Z (TL)"),
+                "K/Z (%)": utils.number_column("K/Z (%)"),
+            }, use_container_width=True)
+        
+        if not (qc.is_available("yahoo") and qc.is_available("tefas")):
+            st.warning("Bir fiyat kaynağına geçici olarak ulaşılamıyor; son bilinen fiyatlar veya maliyetler kullanılıyor.")
+        
+        # Show how old the oldest quote in use is
+        price_times = md.get_price_times(valued['symbol'])
+        if price_times:
+            oldest = min(price_times.values())
+            st.caption(f"Fiyatlar en geç {oldest.strftime('%d-%m-%Y %H:%M')} itibarıyla günceldir.")
+        
+    else:
+        st.info("Portföyünüz boş.")
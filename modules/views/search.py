@@ -0,0 +1,44 @@
+import streamlit as st
+import pandas as pd
+import modules.data_manager as dm
+import modules.cached_data as cd
+import modules.perf as perf
+import modules.utils as utils
+
+def render(query, page_size=50):
+    """Arama: full-text search results over transaction descriptions and categories."""
+    st.title("🔍 Arama Sonuçları")
+
+    # Back to the first page whenever the query changes
+    if st.session_state.get("search_query") != query:
+        st.session_state["search_query"] = query
+        st.session_state["search_offset"] = 0
+    offset = st.session_state["search_offset"]
+
+    df, total = cd.search_transactions(query, page_size, offset)
+    if total == 0:
+        st.info(f"“{query}” için sonuç bulunamadı.")
+        return
+    st.caption(f"“{query}” için {utils.format_number(total, 0)} işlem bulundu"
+               + (" (en yeni eklenenler önce)." if total > dm.RANKED_MAX_MATCHES else " (en uygun sonuçlar önce)."))
+
+    n1, n2, n3 = st.columns([1, 2, 1])
+    with n1:
+        if st.button("◀ Önceki", disabled=offset == 0, key="search_prev", use_container_width=True):
+            st.session_state["search_offset"] = max(0, offset - page_size)
+            st.rerun()
+    with n2:
+        st.caption(f"Sayfa {offset // page_size + 1} / {(total - 1) // page_size + 1}")
+    with n3:
+        if st.button("Sonraki ▶", disabled=offset + page_size >= total, key="search_next", use_container_width=True):
+            st.session_state["search_offset"] = offset + page_size
+            st.rerun()
+
+    display_df = df.drop(columns=['asset_id', 'import_hash'])
+    display_df['date'] = pd.to_datetime(display_df['date'])
+    display_df.columns = [col.upper() for col in display_df.columns]
+    with perf.span("table.search"):
+        st.dataframe(display_df, column_config=utils.transaction_columns(), use_container_width=True, hide_index=True)
+
+    if dm.get_archive_months():
+        st.caption("Arşivlenmiş işlemler aramaya dahil değildir.")
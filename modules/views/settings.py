@@ -0,0 +1,162 @@
+import streamlit as st
+import pandas as pd
+import datetime
+import modules.data_manager as dm
+import modules.perf as perf
+import modules.utils as utils
+
+def render():
+    """Ayarlar: maintenance, background services and performance data."""
+    st.title("⚙️ Ayarlar")
+    st.write("Veritabanı ve uygulama ayarları.")
+    
+    st.markdown("### 🧮 Bakiye Tutarlılığı")
+    st.write("Nakit bakiyesi, işlemler eklendikçe güncellenen toplamlar tablosundan okunur.")
+    if st.button("Tutarlılığı Kontrol Et"):
+        mismatches = dm.check_totals()
+        if mismatches:
+            st.error(f"{len(mismatches)} tutarsız toplam bulundu. Yeniden oluşturabilirsiniz.")
+        else:
+            st.success("Toplamlar işlemlerle tutarlı.")
+    if st.button("Toplamları Yeniden Oluştur"):
+        dm.rebuild_totals()
+        st.success("Toplamlar işlemlerden yeniden hesaplandı.")
+    
+    st.markdown("### 📈 Varlık Geçmişi")
+    st.write("Seçilen aralıktaki günlük net varlığı işlemlerden ve geçmiş fiyatlardan yeniden hesaplar.")
+    b1, b2 = st.columns(2)
+    with b1:
+        backfill_start = st.date_input("Başlangıç", datetime.date.today() - datetime.timedelta(days=365), format="DD-MM-YYYY", key="backfill_start")
+    with b2:
+        backfill_end = st.date_input("Bitiş", datetime.date.today(), format="DD-MM-YYYY", key="backfill_end")
+    if st.button("Geçmişi Yeniden Hesapla"):
+        import modules.backfill as backfill
+        with st.spinner("Geçmiş fiyatlar çekiliyor..."):
+            days = backfill.backfill_history(backfill_start, backfill_end)
+        st.success(f"{days} günlük geçmiş kaydedildi.")
+        skipped = (backfill_end - backfill_start).days + 1 - days
+        if skipped > 0:
+            st.warning(f"Döviz kuru bulunamayan {skipped} gün kaydedilmedi.")
+    
+    st.markdown("### 🔄 Fiyat Güncelleyici")
+    st.write("Portföydeki varlıkların fiyatları arka planda düzenli olarak güncellenir; sayfalar yalnızca kayıtlı fiyatları okur.")
+    import modules.quote_refresher as qr
+    refresher = qr.get_status()
+    r1, r2, r3 = st.columns(3)
+    r1.metric("DURUM", "Çalışıyor" if refresher['running'] and refresher['enabled'] else "Durduruldu")
+    r2.metric("SON GÜNCELLEME", datetime.datetime.fromtimestamp(refresher['last_run']).strftime('%H:%M:%S') if refresher['last_run'] else "-")
+    r3.metric("GÜNCELLENEN FİYAT", refresher['quotes'])
+    if refresher['last_error']:
+        st.error(f"Son hata: {refresher['last_error']}")
+    st.caption("TEFAS fonları yalnızca hafta içi 09:00-19:00 arasında güncellenir.")
+    with st.form("refresher_form"):
+        refresher_enabled = st.checkbox("Arka planda güncelle", value=refresher['enabled'])
+        refresher_minutes = st.number_input("Güncelleme Aralığı (dakika)", min_value=qr.MIN_INTERVAL // 60, step=1, value=refresher['interval'] // 60)
+        if st.form_submit_button("Kaydet"):
+            qr.configure(refresher_enabled, refresher_minutes * 60)
+            st.success("Güncelleyici ayarları kaydedildi.")
+    if st.button("Şimdi Güncelle"):
+        qr.refresh_now()
+        st.success("Fiyatlar arka planda güncelleniyor.")
+    
+    # Call / failure / latency counters per price provider (see modules/quote_cache.py)
+    import modules.quote_cache as qc
+    provider_stats = qc.get_stats()
+    if provider_stats:
+        st.dataframe(pd.DataFrame([
+            {
+                "KAYNAK": upstream.upper(),
+                "DURUM": "Beklemede" if stats['open_until'] else "Aktif",
+                "ÇAĞRI": stats['calls'],
+                "HATALI ÇAĞRI": stats['failures'],
+                "FİYATSIZ SEMBOL": stats['symbols_failed'],
+                "ORT. SÜRE (ms)": round(stats['avg_latency'] * 1000) if stats['avg_latency'] is not None else None,
+                "SON HATA": stats['last_error'] or "",
+            }
+            for upstream, stats in sorted(provider_stats.items())
+        ]), use_container_width=True, hide_index=True)
+    failing = qc.get_failing_symbols()
+    if failing:
+        st.caption("Fiyatı alınamayan semboller: " + ", ".join(
+            f"{symbol} ({datetime.datetime.fromtimestamp(retry_at).strftime('%H:%M')} sonra denenecek)"
+            for _, symbol, _, retry_at in failing
+        ))
+    if (provider_stats or failing) and st.button("Hataları Sıfırla"):
+        qc.reset_failures()
+        st.rerun()
+    
+    st.markdown("### ⏱️ Performans")
+    st.write("Son sayfa yüklemelerinde sürenin veritabanı, fiyat kaynakları, grafikler ve tablolar arasında dağılımı.")
+    renders = perf.get_renders()
+    if renders:
+        spans = pd.DataFrame([
+            {"render": i, **span}
+            for i, r in enumerate(renders) for span in r['spans']
+        ], columns=["render", "name", "ms", "hits", "stale", "misses"])
+        category = spans['name'].str.split(".").str[0]
+        # *.quotes spans contain their *.fetch spans, so network time only sums fetches
+        by_render = pd.DataFrame({
+            "db": spans['ms'].where(category == "db"),
+            "network": spans['ms'].where(spans['name'].str.endswith(".fetch")),
+            "chart": spans['ms'].where(category == "chart"),
+            "table": spans['ms'].where(category == "table"),
+            "hits": spans['hits'],
+            "misses": spans['misses'],
+        }).groupby(spans['render']).sum()
+        
+        n_renders = st.number_input("Gösterilecek Yükleme Sayısı", min_value=1, max_value=perf.RENDER_HISTORY, value=min(20, perf.RENDER_HISTORY), step=1)
+        recent_renders = pd.DataFrame({
+            "ZAMAN": [datetime.datetime.fromtimestamp(r['ts']).strftime('%H:%M:%S') for r in renders],
+            "SAYFA": [r['page'] for r in renders],
+            "TOPLAM (ms)": [r['total_ms'] for r in renders],
+        }).join(by_render.rename(columns={
+            "db": "VERİTABANI (ms)",
+            "network": "AĞ (ms)",
+            "chart": "GRAFİK (ms)",
+            "table": "TABLO (ms)",
+            "hits": "ÖNBELLEK İSABET",
+            "misses": "ÖNBELLEK KAÇIRMA",
+        })).fillna(0)
+        st.dataframe(recent_renders.iloc[::-1].head(int(n_renders)).round(1), use_container_width=True, hide_index=True)
+        
+        st.caption("Yüzdelikler (ms)")
+        totals = pd.DataFrame({"name": [f"sayfa.{r['page']}" for r in renders], "ms": [r['total_ms'] for r in renders]})
+        percentiles = pd.concat([totals, spans[['name', 'ms']]]).groupby('name')['ms'].describe(percentiles=[0.5, 0.95])
+        st.dataframe(
+            percentiles[['count', '50%', '95%', 'max']].round(1).rename(columns={"count": "ADET", "50%": "P50", "95%": "P95", "max": "EN FAZLA"}),
+            use_container_width=True
+        )
+    else:
+        st.info("Henüz ölçüm yok.")
+    
+    log_enabled = st.checkbox(f"Ölçümleri dosyaya yaz ({perf.LOG_FILE})", value=perf.get_log_file() is not None)
+    if log_enabled != (perf.get_log_file() is not None):
+        perf.set_log_file(perf.LOG_FILE if log_enabled else None)
+        dm.set_setting("perf_log", "1" if log_enabled else "0")
+    
+    st.markdown("### 🗄️ Arşiv")
+    st.write("Eski işlemler aylık Parquet dosyalarına taşınır; sayfalar yalnızca güncel işlemleri okur. Arşivlenen işlemler bakiyede ve raporlarda yer almaya devam eder, ancak düzenlenemez.")
+    import modules.archive as archive
+    hot_rows, archived_rows, archived_months = dm.get_archive_stats()
+    a1, a2, a3 = st.columns(3)
+    a1.metric("GÜNCEL İŞLEM", utils.format_number(hot_rows, 0))
+    a2.metric("ARŞİVDEKİ İŞLEM", utils.format_number(archived_rows, 0))
+    a3.metric("ARŞİV AYI", utils.format_number(archived_months, 0))
+    with st.form("archive_form"):
+        horizon = st.number_input("Şu kadar aydan eski işlemleri arşivle", min_value=1, max_value=240, step=1, value=archive.get_horizon())
+        st.caption(f"{archive.get_cutoff(int(horizon)).strftime('%d-%m-%Y')} tarihinden önceki işlemler (yatırım işlemleri hariç) arşivlenir.")
+        if st.form_submit_button("Eski İşlemleri Arşivle"):
+            dm.set_setting("archive_horizon", int(horizon))
+            with st.spinner("İşlemler arşivleniyor..."):
+                moved = archive.archive_transactions(int(horizon))
+            st.success(f"{utils.format_number(moved, 0)} işlem arşive taşındı.")
+    
+    st.markdown("### ⚠️ Tehlikeli Bölge")
+    st.warning("Veritabanını sıfırlamak tüm verilerinizi (işlemler ve portföy) kalıcı olarak silecektir.")
+    
+    confirm_reset = st.checkbox("Tüm verileri silmek istediğime eminim.")
+    
+    if st.button("Veritabanını Sıfırla", type="primary", disabled=not confirm_reset):
+        dm.reset_db()
+        st.success("Veritabanı başarıyla sıfırlandı! Sayfa yenileniyor...")
+        st.rerun()
@@ -0,0 +1,162 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+import datetime
+import modules.data_manager as dm
+import modules.cached_data as cd
+import modules.perf as perf
+import modules.utils as utils
+
+# Net worth chart windows (days back from today; None = all history)
+HISTORY_RANGES = {"1 Ay": 31, "3 Ay": 92, "1 Yıl": 366, "3 Yıl": 3 * 366, "Tümü": None}
+RESOLUTION_LABELS = {"auto": "Otomatik", "daily": "Günlük", "weekly": "Haftalık", "monthly": "Aylık"}
+
+def render():
+    """Özet: net worth metrics, trend, category, allocation and monthly charts, recent transactions."""
+    st.title("📊 Finansal Özet")
+    
+    # --- Calculate Metrics ---
+    # Reads are cached until the next write (see modules/cached_data.py)
+    # Running totals per currency, converted to TRY with one FX lookup per currency
+    total_income, total_expense = cd.get_cash_totals()
+    cash_balance = total_income - total_expense
+    
+    # Portfolio Value & Data for Chart
+    total_portfolio_value = 0
+    portfolio_chart_data = pd.DataFrame()
+    
+    # Prices come from the quote cache (see modules/quote_cache.py),
+    # falling back to cost basis if live fetch fails
+    valued = cd.get_valued_portfolio()
+    if not valued.empty:
+        total_portfolio_value = valued['current_value'].sum()
+        portfolio_chart_data = valued[['symbol', 'current_value']]
+    
+    net_worth = cash_balance + total_portfolio_value
+    
+    # --- Save Daily Snapshot ---
+    # Automatically save today's net worth when visiting the dashboard
+    # (not while a currency has no FX rate: the total would be incomplete)
+    today_str = datetime.date.today().strftime("%Y-%m-%d")
+    if pd.notna(net_worth):
+        dm.save_daily_snapshot(today_str, net_worth, cash_balance, total_portfolio_value)
+    else:
+        st.warning("Bazı döviz kurları alınamadığı için nakit ve toplam varlık hesaplanamadı.")
+    
+    # --- Display Metrics ---
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("TOPLAM VARLIK (NET)", utils.format_currency(net_worth, "₺") or "—")
+    # User requested to remove the green indicator (delta)
+    col2.metric("NAKİT DURUMU", utils.format_currency(cash_balance, "₺") or "—") 
+    col3.metric("PORTFÖY DEĞERİ", utils.format_currency(total_portfolio_value, "₺"))
+    col4.metric("TOPLAM GELİR", utils.format_currency(total_income, "₺") or "—")
+    
+    # --- Net Worth Trend Chart (New) ---
+    st.subheader("VARLIK GELİŞİMİ")
+    # Only the selected window is read from SQLite
+    r1, r2 = st.columns([3, 1])
+    with r1:
+        history_range = st.radio("Aralık", list(HISTORY_RANGES), index=2, horizontal=True, label_visibility="collapsed")
+    with r2:
+        resolution = st.selectbox("Çözünürlük", list(RESOLUTION_LABELS), format_func=RESOLUTION_LABELS.get, label_visibility="collapsed")
+    days = HISTORY_RANGES[history_range]
+    start_date = datetime.date.today() - datetime.timedelta(days=days) if days else None
+    history_df, used_resolution = cd.get_history_points(start_date, None, resolution)
+    if not history_df.empty:
+        with perf.span("chart.trend", points=len(history_df)):
+            # Line chart for Net Worth (markers only while points are still distinguishable)
+            fig_trend = px.line(history_df, x='date', y='net_worth', markers=len(history_df) <= 120)
+            # Turkish formatting for numbers (decimal=, thousands=.) and Date format (dd-mm-yyyy)
+            fig_trend.update_layout(
+                margin=dict(t=30, b=0, l=0, r=0), 
+                height=300, 
+                xaxis_title=None, 
+                yaxis_title=None,
+                separators=",." 
+            )
+            fig_trend.update_xaxes(tickformat="%d-%m-%Y")
+            fig_trend.update_yaxes(tickformat=",.") # Use the separators format
+            st.plotly_chart(fig_trend, use_container_width=True)
+        if used_resolution != "daily":
+            st.caption(f"{RESOLUTION_LABELS[used_resolution]} kapanış değerleri gösteriliyor.")
+    else:
+        st.info("Henüz geçmiş veri yok.")
+
+    # --- Charts ---
+    col_chart1, col_chart2 = st.columns(2)
+    
+    with col_chart1:
+        st.subheader("GELİR / GİDER DAĞILIMI")
+        flow_type = st.radio("Tür", ["Gider", "Gelir"], horizontal=True, label_visibility="collapsed", key="category_chart_type")
+        # One row per category, aggregated in SQL and converted to TRY
+        category_totals = cd.get_category_totals(flow_type)
+        if category_totals['total'].isna().any():
+            st.caption("Döviz kuru alınamayan kategoriler gösterilmiyor.")
+            category_totals = category_totals.dropna(subset=['total'])
+        if not category_totals.empty:
+            with perf.span("chart.categories"):
+                fig = px.pie(category_totals, values='total', names='category', color='category', hole=0.4)
+                fig.update_layout(
+                    margin=dict(t=30, b=0, l=0, r=0), 
+                    height=300,
+                    separators=",."
+                )
+                st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("Veri yok.")
+            
+    with col_chart2:
+        st.subheader("VARLIK DAĞILIMI")
+        if not portfolio_chart_data.empty:
+            with perf.span("chart.allocation"):
+                fig2 = px.pie(portfolio_chart_data, values='current_value', names='symbol', hole=0.4)
+                fig2.update_layout(
+                    margin=dict(t=30, b=0, l=0, r=0), 
+                    height=300,
+                    separators=",."
+                )
+                st.plotly_chart(fig2, use_container_width=True)
+        else:
+            st.info("Portföy boş.")
+            
+    # --- Monthly Income / Expense ---
+    st.subheader("AYLIK GELİR / GİDER")
+    monthly = cd.get_monthly_flows()
+    if monthly[['income', 'expense']].isna().any().any():
+        st.caption("Döviz kuru alınamadığı için bazı aylar eksik gösteriliyor.")
+    if not monthly.empty:
+        with perf.span("chart.monthly"):
+            fig3 = px.bar(
+                monthly.rename(columns={'income': 'Gelir', 'expense': 'Gider'}),
+                x='month', y=['Gelir', 'Gider'], barmode='group',
+                color_discrete_map={'Gelir': '#2ecc71', 'Gider': '#ff4b4b'}
+            )
+            fig3.update_layout(
+                margin=dict(t=30, b=0, l=0, r=0), 
+                height=300,
+                xaxis_title=None, 
+                yaxis_title=None,
+                legend_title=None,
+                separators=",."
+            )
+            fig3.update_xaxes(type='category')
+            st.plotly_chart(fig3, use_container_width=True)
+    else:
+        st.info("Veri yok.")
+            
+    # --- Recent Transactions ---
+    st.subheader("SON İŞLEMLER")
+    recent, _ = cd.get_transactions_page(limit=5)
+    if not recent.empty:
+        # Rename columns for display
+        display_df = recent.drop(columns=['asset_id', 'import_hash'])
+        
+        # Dates and amounts stay typed; the browser formats them (see utils.transaction_columns)
+        display_df['date'] = pd.to_datetime(display_df['date'])
+        
+        display_df.columns = [col.upper() for col in display_df.columns]
+        
+        with perf.span("table.recent"):
+            st.dataframe(display_df, column_config=utils.transaction_columns(), use_container_width=True)
+    else:
+        st.info("Henüz işlem kaydı yok.")
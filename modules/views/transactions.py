@@ -0,0 +1,180 @@
+import streamlit as st
+import pandas as pd
+import datetime
+import modules.data_manager as dm
+import modules.cached_data as cd
+import modules.perf as perf
+import modules.utils as utils
+
+def transaction_pager(key, page_size=50, include_archive=True):
+    """
+    Renders filters and page navigation for transactions; returns the current page as a DataFrame.
+    include_archive: also page through archived (read-only) transactions.
+    """
+    f1, f2, f3, f4 = st.columns(4)
+    with f1:
+        start_date = st.date_input("Başlangıç", value=None, format="DD-MM-YYYY", key=f"{key}_start")
+    with f2:
+        end_date = st.date_input("Bitiş", value=None, format="DD-MM-YYYY", key=f"{key}_end")
+    with f3:
+        t_type = st.selectbox("Tür", ["Tümü", "Gelir", "Gider"], key=f"{key}_type")
+    with f4:
+        category = st.selectbox("Kategori", ["Tümü"] + cd.get_categories(), key=f"{key}_category")
+    
+    filters = {
+        "start_date": start_date,
+        "end_date": end_date,
+        "type": None if t_type == "Tümü" else t_type,
+        "category": None if category == "Tümü" else category,
+    }
+    # Start keys of visited pages; reset when filters change
+    if st.session_state.get(f"{key}_filters") != filters:
+        st.session_state[f"{key}_filters"] = filters
+        st.session_state[f"{key}_pages"] = [None]
+    pages = st.session_state[f"{key}_pages"]
+    
+    page_df, next_key = cd.get_transactions_page(pages[-1], page_size, filters, include_archive)
+    
+    n1, n2, n3 = st.columns([1, 2, 1])
+    with n1:
+        if st.button("◀ Önceki", disabled=len(pages) == 1, key=f"{key}_prev", use_container_width=True):
+            pages.pop()
+            st.rerun()
+    with n2:
+        st.caption(f"Sayfa {len(pages)}")
+    with n3:
+        if st.button("Sonraki ▶", disabled=next_key is None, key=f"{key}_next", use_container_width=True):
+            pages.append(next_key)
+            st.rerun()
+    return page_df
+
+def render():
+    """Gelir/Gider Ekle: add, edit, import and browse transactions."""
+    st.title("💸 Gelir & Gider Yönetimi")
+    
+    tab1, tab2, tab3 = st.tabs(["Yeni Ekle", "Düzenle / Sil", "İçe Aktar"])
+    
+    with tab1:
+        st.subheader("Yeni İşlem Ekle")
+        with st.form("transaction_form", clear_on_submit=True):
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                date = st.date_input("Tarih", datetime.date.today(), format="DD-MM-YYYY")
+                t_type = st.selectbox("Tür", ["Gelir", "Gider"])
+                category = st.text_input("Kategori (Örn: Market, Maaş, Kira)")
+            
+            with col2:
+                amount = st.number_input("Tutar", min_value=0.0, step=0.01, format="%.2f")
+                currency = st.selectbox("Para Birimi", ["TRY", "USD", "EUR"])
+                description = st.text_input("Açıklama")
+                
+            submitted = st.form_submit_button("Kaydet")
+            
+            if submitted:
+                if amount > 0:
+                    dm.add_transaction(date, t_type, category, amount, currency, description)
+                    st.success("İşlem başarıyla kaydedildi!")
+                else:
+                    st.error("Lütfen geçerli bir tutar giriniz.")
+
+    with tab2:
+        st.subheader("İşlem Düzenle / Sil")
+        # Archived transactions are read-only
+        df = transaction_pager("edit", include_archive=False)
+        if not df.empty:
+            # Create a selection list (current page only)
+            labels = (df['id'].astype(str) + " | " + df['date'].astype(str) + " | " + df['type'] + " | "
+                      + df['amount'].astype(str) + " " + df['currency'] + " | " + df['category'].fillna(""))
+            labels = dict(zip(df['id'], labels))
+            selected_id = st.selectbox("İşlem Seçiniz", df['id'], format_func=labels.get)
+            
+            if selected_id is not None:
+                selected_row = df[df['id'] == selected_id].iloc[0]
+                
+                with st.form("edit_transaction_form"):
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        new_date = st.date_input("Tarih", datetime.datetime.strptime(selected_row['date'], '%Y-%m-%d').date(), format="DD-MM-YYYY")
+                        new_type = st.selectbox("Tür", ["Gelir", "Gider"], index=0 if selected_row['type'] == "Gelir" else 1)
+                        new_category = st.text_input("Kategori", value=selected_row['category'])
+                    with col2:
+                        new_amount = st.number_input("Tutar", min_value=0.0, step=0.01, format="%.2f", value=float(selected_row['amount']))
+                        new_currency = st.selectbox("Para Birimi", ["TRY", "USD", "EUR"], index=["TRY", "USD", "EUR"].index(selected_row['currency']))
+                        new_description = st.text_input("Açıklama", value=selected_row['description'])
+                        
+                    c1, c2 = st.columns(2)
+                    with c1:
+                        update_submitted = st.form_submit_button("Güncelle")
+                    with c2:
+                        delete_submitted = st.form_submit_button("Sil", type="primary")
+                        
+                    if update_submitted:
+                        dm.update_transaction(selected_id, new_date, new_type, new_category, new_amount, new_currency, new_description)
+                        st.success("İşlem güncellendi!")
+                        st.rerun()
+                        
+                    if delete_submitted:
+                        dm.delete_transaction(selected_id)
+                        st.warning("İşlem silindi!")
+                        st.rerun()
+        else:
+            st.info("Düzenlenecek işlem bulunamadı.")
+
+    with tab3:
+        st.subheader("Banka Ekstresi İçe Aktar")
+        import modules.importer as importer
+        uploaded = st.file_uploader("CSV veya Excel dosyası", type=["csv", "xlsx"])
+        if uploaded:
+            columns = importer.read_columns(uploaded, uploaded.name)
+            field_labels = {
+                "date": "Tarih",
+                "amount": "Tutar",
+                "description": "Açıklama",
+                "category": "Kategori",
+                "type": "Tür (Gelir/Gider)",
+                "currency": "Para Birimi",
+            }
+            with st.form("import_form"):
+                st.caption("Dosyadaki sütunları işlem alanlarıyla eşleştirin. Tür seçilmezse negatif tutarlar gider sayılır.")
+                mapping = {}
+                map_cols = st.columns(3)
+                for i, field in enumerate(importer.FIELDS):
+                    options = columns if field in importer.REQUIRED_FIELDS else ["(Yok)"] + columns
+                    with map_cols[i % 3]:
+                        choice = st.selectbox(field_labels[field], options, key=f"import_{field}")
+                    mapping[field] = None if choice == "(Yok)" else choice
+                o1, o2 = st.columns(2)
+                with o1:
+                    dayfirst = st.checkbox("Tarihte gün önce (GG.AA.YYYY)", value=True)
+                with o2:
+                    decimal = st.selectbox("Ondalık ayırıcı", [",", "."])
+                import_submitted = st.form_submit_button("İçe Aktar", type="primary")
+            
+            if import_submitted:
+                progress_text = st.empty()
+                def show_progress(rows_read, rows_inserted):
+                    progress_text.caption(f"{utils.format_number(rows_read, 0)} satır okundu, {utils.format_number(rows_inserted, 0)} yeni işlem eklendi...")
+                rows_read, rows_inserted = importer.import_statement(
+                    uploaded, uploaded.name, mapping, dayfirst=dayfirst, decimal=decimal, progress=show_progress
+                )
+                progress_text.empty()
+                st.success(f"{utils.format_number(rows_read, 0)} satırdan {utils.format_number(rows_inserted, 0)} yeni işlem eklendi ({utils.format_number(rows_read - rows_inserted, 0)} atlandı).")
+
+    st.markdown("---")
+    st.subheader("SON İŞLEMLER")
+    # Page through transactions with filters applied in SQL
+    df = transaction_pager("list")
+    if not df.empty:
+        # Rename columns for display
+        display_df = df.drop(columns=['asset_id', 'import_hash'])
+        
+        # Dates and amounts stay typed; the browser formats them (see utils.transaction_columns)
+        display_df['date'] = pd.to_datetime(display_df['date'])
+        
+        display_df.columns = [col.upper() for col in display_df.columns]
+        
+        with perf.span("table.transactions"):
+            st.dataframe(display_df, column_config=utils.transaction_columns(), use_container_width=True)
+    else:
+        st.info("Henüz işlem kaydı yok.")